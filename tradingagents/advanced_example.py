@@ -11,13 +11,15 @@ from typing import Dict, Any
 
 # 导入高级功能模块
 from tradingagents.automated_trading import AutomatedTrader, TradingConfig
+from tradingagents.real_brokers.base_broker import configure_async_logging
 from tradingagents.real_brokers.huatai_broker import HuataiBroker
 from tradingagents.technical_analysis.advanced_indicators import AdvancedTechnicalAnalyzer
 from tradingagents.web_interface.app import run_web_server
 from tradingagents.notification.email_service import EmailService, EmailConfig, NotificationManager
 
-# 配置日志
+# 配置日志，日志写入在后台线程完成
 logging.basicConfig(level=logging.INFO)
+configure_async_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -218,28 +220,30 @@ def email_notification_example():
 
     # 每日报告
     print("   - 发送每日报告...")
-    report_data = {
-        'date': '2024-01-15',
-        'initial_value': 100000.0,
-        'current_value': 102500.0,
-        'daily_pnl': 2500.0,
-        'daily_pnl_ratio': 0.025,
-        'orders_count': 5,
-        'positions_count': 3,
-        'alerts_count': 2,
-        'top_positions': [
-            {
-                'symbol': 'AAPL',
-                'quantity': 100,
-                'average_price': 150.0,
-                'current_price': 155.0,
-                'market_value': 15500.0,
-                'unrealized_pnl': 500.0
-            }
-        ]
-    }
-
-    notification_manager.send_daily_report(report_data)
+    # 未启用每日报告或没有收件人时跳过报告数据的准备
+    if notification_manager.will_send('daily_reports'):
+        report_data = {
+            'date': '2024-01-15',
+            'initial_value': 100000.0,
+            'current_value': 102500.0,
+            'daily_pnl': 2500.0,
+            'daily_pnl_ratio': 0.025,
+            'orders_count': 5,
+            'positions_count': 3,
+            'alerts_count': 2,
+            'top_positions': [
+                {
+                    'symbol': 'AAPL',
+                    'quantity': 100,
+                    'average_price': 150.0,
+                    'current_price': 155.0,
+                    'market_value': 15500.0,
+                    'unrealized_pnl': 500.0
+                }
+            ]
+        }
+
+        notification_manager.send_daily_report(report_data)
 
     print("\n✅ 示例邮件发送完成（请检查邮箱）")
 
@@ -5,16 +5,42 @@
 
 import os
 import json
+import functools
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field, asdict
 import logging
 
+# YAML 解析优先使用 libyaml 的C实现
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# TOML 读写后端：优先使用 rtoml（Rust 实现），否则回退到 tomllib/tomli + tomli_w
+try:
+    import rtoml as _toml_reader
+    _toml_writer = _toml_reader
+except ImportError:
+    try:
+        import tomllib as _toml_reader
+    except ImportError:
+        try:
+            import tomli as _toml_reader
+        except ImportError:
+            _toml_reader = None
+    try:
+        import tomli_w as _toml_writer
+    except ImportError:
+        _toml_writer = None
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+logger.info(f"YAML解析器: {'libyaml (CSafeLoader)' if _YamlLoader.__name__ == 'CSafeLoader' else '纯Python (SafeLoader)'}")
+
 
 @dataclass
 class TradingConfig:
@@ -128,6 +154,8 @@ class EmailNotificationConfig:
     email_password: str = ''
     use_tls: bool = True
     sender_name: str = 'TradingAgents'
+    transport: str = 'smtp'  # 发送方式: smtp 或 sendgrid
+    api_key: str = ''  # HTTP邮件API密钥（transport为sendgrid时使用）
 
     # 通知选项
     notifications: Dict[str, bool] = field(default_factory=lambda: {
@@ -187,9 +215,9 @@ class DatabaseConfig:
     })
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AgentLLMConfig:
-    """智能体LLM配置"""
+    """智能体LLM配置（不可变，相同参数的配置共享同一实例）"""
     # 基础LLM配置
     provider: str = "openai"  # openai, anthropic, google, ollama, openrouter
     model: str = "gpt-4o-mini"
@@ -211,6 +239,12 @@ class AgentLLMConfig:
     enabled: bool = True
 
 
+@functools.lru_cache(maxsize=None)
+def _llm(**kwargs) -> AgentLLMConfig:
+    """创建或复用相同参数的AgentLLMConfig实例"""
+    return AgentLLMConfig(**kwargs)
+
+
 @dataclass
 class SystemConfig:
     """完整系统配置"""
@@ -231,88 +265,88 @@ class SystemConfig:
     # LLM配置
     llm: Dict[str, AgentLLMConfig] = field(default_factory=lambda: {
         # 全局默认配置
-        'default': AgentLLMConfig(),
+        'default': _llm(),
 
         # 智能体特定配置
-        'analysts': AgentLLMConfig(
+        'analysts': _llm(
             model="gpt-4o",
             temperature=0.3,
             max_tokens=2048
         ),
-        'researchers': AgentLLMConfig(
+        'researchers': _llm(
             model="o1-preview",
             temperature=0.8,
             max_tokens=4096
         ),
-        'trader': AgentLLMConfig(
+        'trader': _llm(
             model="gpt-4o",
             temperature=0.2,
             max_tokens=2048
         ),
-        'risk_manager': AgentLLMConfig(
+        'risk_manager': _llm(
             model="gpt-4o",
             temperature=0.1,
             max_tokens=2048
         ),
 
         # 具体分析师配置
-        'market_analyst': AgentLLMConfig(
+        'market_analyst': _llm(
             model="gpt-4o-mini",
             temperature=0.4,
             max_tokens=2048
         ),
-        'fundamentals_analyst': AgentLLMConfig(
+        'fundamentals_analyst': _llm(
             model="gpt-4o",
             temperature=0.3,
             max_tokens=2048
         ),
-        'news_analyst': AgentLLMConfig(
+        'news_analyst': _llm(
             model="gpt-4o-mini",
             temperature=0.4,
             max_tokens=2048
         ),
-        'social_media_analyst': AgentLLMConfig(
+        'social_media_analyst': _llm(
             model="gpt-4o-mini",
             temperature=0.4,
             max_tokens=2048
         ),
 
         # 研究员配置
-        'bull_researcher': AgentLLMConfig(
+        'bull_researcher': _llm(
             model="o1-preview",
             temperature=0.7,
             max_tokens=4096
         ),
-        'bear_researcher': AgentLLMConfig(
+        'bear_researcher': _llm(
             model="o1-preview",
             temperature=0.7,
             max_tokens=4096
         ),
 
         # 经理配置
-        'research_manager': AgentLLMConfig(
+        'research_manager': _llm(
             model="o1-preview",
             temperature=0.5,
             max_tokens=4096
         ),
-        'risk_judge': AgentLLMConfig(
+        'risk_judge': _llm(
             model="gpt-4o",
             temperature=0.1,
             max_tokens=2048
         ),
 
         # 风险分析师配置
-        'risky_analyst': AgentLLMConfig(
+        'risky_analyst': _llm(
             model="gpt-4o-mini",
             temperature=0.6,
             max_tokens=2048
         ),
-        'safe_analyst': AgentLLMConfig(
+        'safe_analyst': _llm(
             model="gpt-4o-mini",
             temperature=0.2,
             max_tokens=2048
         ),
-        'neutral_analyst': AgentLLMConfig(
+        'neutral_analyst': _llm(
             model="gpt-4o-mini",
             temperature=0.4,
             max_tokens=2048
@@ -325,6 +359,28 @@ class SystemConfig:
     logs_dir: str = field(default_factory=lambda: os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs'))
 
 
+def _load_toml(file_path: Path) -> Dict[str, Any]:
+    """读取TOML配置文件"""
+    if _toml_reader is None:
+        raise ImportError("读取TOML配置需要 Python 3.11+ 或安装 tomli/rtoml")
+
+    if _toml_reader.__name__ == 'rtoml':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return _toml_reader.load(f)
+
+    with open(file_path, 'rb') as f:
+        return _toml_reader.load(f)
+
+
+def _save_toml(file_path: Path, config_dict: Dict[str, Any]):
+    """写入TOML配置文件"""
+    if _toml_writer is None:
+        raise ImportError("写入TOML配置需要安装 tomli-w 或 rtoml")
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(_toml_writer.dumps(config_dict))
+
+
 class ConfigManager:
     """配置管理器"""
 
@@ -336,8 +392,13 @@ class ConfigManager:
             config_file: 配置文件路径，如果为None则使用默认路径
         """
         self.project_root = Path(__file__).parent.parent.parent
-        self.default_config_file = self.project_root / 'config' / 'default_config.yaml'
-        self.user_config_file = self.project_root / 'config' / 'user_config.yaml'
+        self.default_config_file = self.project_root / 'config' / 'default_config.toml'
+        self.user_config_file = self.project_root / 'config' / 'user_config.toml'
+
+        # 兼容旧版YAML用户配置
+        legacy_user_config_file = self.project_root / 'config' / 'user_config.yaml'
+        if not self.user_config_file.exists() and legacy_user_config_file.exists():
+            self.user_config_file = legacy_user_config_file
 
         # 如果没有指定配置文件，则尝试加载用户配置
         if config_file:
@@ -362,14 +423,11 @@ class ConfigManager:
                 self._create_default_config()
 
             # 加载配置
-            if self.config_file.suffix.lower() in ['.yaml', '.yml']:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f)
-            elif self.config_file.suffix.lower() == '.json':
+            if self.config_file.suffix.lower() == '.json':
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     config_data = json.load(f)
             else:
-                raise ValueError(f"不支持的配置文件格式: {self.config_file.suffix}")
+                config_data = self._load_with_cache()
 
             # 解析配置
             self.config = self._parse_config(config_data)
@@ -382,6 +440,57 @@ class ConfigManager:
             # 返回默认配置
             return self._create_default_config()
 
+    def _get_cache_file(self) -> Path:
+        """获取配置解析缓存文件路径"""
+        return self.config_file.parent / '.cache' / f'{self.config_file.name}.json'
+
+    def _get_cache_key(self) -> List[Any]:
+        """基于源文件路径、修改时间和大小生成缓存键"""
+        stat = self.config_file.stat()
+        return [str(self.config_file.resolve()), stat.st_mtime_ns, stat.st_size]
+
+    def _load_with_cache(self) -> Dict[str, Any]:
+        """加载YAML/TOML配置，源文件未变化时直接读取JSON缓存"""
+        cache_file = self._get_cache_file()
+        cache_key = self._get_cache_key()
+
+        # 缓存命中：源文件修改时间和大小均未变化
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') == cache_key:
+                return cached['data']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        # 缓存未命中：解析源文件
+        suffix = self.config_file.suffix.lower()
+        if suffix in ['.yaml', '.yml']:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config_data = yaml.load(f, Loader=_YamlLoader)
+        elif suffix == '.toml':
+            config_data = _load_toml(self.config_file)
+        else:
+            raise ValueError(f"不支持的配置文件格式: {self.config_file.suffix}")
+
+        # 写入缓存，失败不影响配置加载
+        try:
+            cache_content = json.dumps({'key': cache_key, 'data': config_data}, ensure_ascii=False)
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                f.write(cache_content)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"配置缓存写入失败: {str(e)}")
+
+        return config_data
+
+    def invalidate_cache(self):
+        """删除配置解析缓存"""
+        try:
+            self._get_cache_file().unlink()
+        except FileNotFoundError:
+            pass
+
     def _create_default_config(self) -> SystemConfig:
         """创建默认配置"""
         try:
@@ -536,6 +645,10 @@ class ConfigManager:
             email_config.use_tls = config_data['use_tls']
         if 'sender_name' in config_data:
             email_config.sender_name = config_data['sender_name']
+        if 'transport' in config_data:
+            email_config.transport = config_data['transport']
+        if 'api_key' in config_data:
+            email_config.api_key = config_data['api_key']
         if 'notifications' in config_data:
             email_config.notifications.update(config_data['notifications'])
         if 'recipients' in config_data:
@@ -596,16 +709,15 @@ class ConfigManager:
 
         for agent_name, agent_config in config_data.items():
             if isinstance(agent_config, dict):
-                llm_config = AgentLLMConfig()
-
                 # 解析基本配置
+                llm_kwargs = {}
                 for field in ['provider', 'model', 'backend_url', 'temperature', 'max_tokens',
                              'top_p', 'frequency_penalty', 'presence_penalty', 'max_requests_per_minute',
                              'timeout', 'max_retries', 'enabled']:
                     if field in agent_config:
-                        setattr(llm_config, field, agent_config[field])
+                        llm_kwargs[field] = agent_config[field]
 
-                llm_configs[agent_name] = llm_config
+                llm_configs[agent_name] = _llm(**llm_kwargs)
             else:
                 # 如果不是字典，保持原有的AgentLLMConfig
                 llm_configs[agent_name] = agent_config
@@ -630,6 +742,8 @@ class ConfigManager:
             elif file_path.suffix.lower() == '.json':
                 with open(file_path, 'w', encoding='utf-8') as f:
                     json.dump(config_dict, f, ensure_ascii=False, indent=2)
+            elif file_path.suffix.lower() == '.toml':
+                _save_toml(file_path, config_dict)
             else:
                 raise ValueError(f"不支持的配置文件格式: {file_path.suffix}")
 
@@ -688,6 +802,8 @@ class ConfigManager:
                 'email_password': self.config.email_notification.email_password,
                 'use_tls': self.config.email_notification.use_tls,
                 'sender_name': self.config.email_notification.sender_name,
+                'transport': self.config.email_notification.transport,
+                'api_key': self.config.email_notification.api_key,
                 'notifications': self.config.email_notification.notifications,
                 'recipients': self.config.email_notification.recipients
             },
@@ -717,7 +833,10 @@ class ConfigManager:
                 'url': self.config.database.url,
                 'postgresql': self.config.database.postgresql
             },
-            'llm': self.config.llm
+            'llm': {
+                agent_name: asdict(agent_config) if isinstance(agent_config, AgentLLMConfig) else agent_config
+                for agent_name, agent_config in self.config.llm.items()
+            }
         }
 
         return config_dict
@@ -780,7 +899,12 @@ class ConfigManager:
             if config.email_notification.enabled:
                 if not config.email_notification.email_user:
                     errors.append("邮件用户名不能为空")
-                if not config.email_notification.email_password:
+                if config.email_notification.transport == 'sendgrid':
+                    if not config.email_notification.api_key:
+                        errors.append("SendGrid API密钥不能为空")
+                elif config.email_notification.transport != 'smtp':
+                    errors.append("邮件发送方式必须为smtp或sendgrid")
+                elif not config.email_notification.email_password:
                     errors.append("邮件密码不能为空")
                 if not config.email_notification.recipients:
                     errors.append("邮件收件人不能为空")
@@ -812,6 +936,12 @@ def load_config(config_file: str = None) -> SystemConfig:
     return config_manager.load_config()
 
 
+def reload_config() -> SystemConfig:
+    """丢弃解析缓存并从磁盘重新加载全局配置"""
+    config_manager.invalidate_cache()
+    return config_manager.load_config()
+
+
 def save_config(config_file: str = None) -> bool:
     """保存配置"""
     return config_manager.save_config(config_file)
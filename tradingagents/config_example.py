@@ -13,12 +13,14 @@ from tradingagents.config.config_manager import (
     ConfigManager, get_config, load_config, save_config,
     update_config, validate_config
 )
+from tradingagents.example_utils import batched_output
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@batched_output
 def basic_config_example():
     """基本配置使用示例"""
     print("=" * 60)
@@ -44,6 +46,7 @@ def basic_config_example():
     return config
 
 
+@batched_output
 def custom_config_example():
     """自定义配置示例"""
     print("\n" + "=" * 60)
@@ -89,6 +92,7 @@ def custom_config_example():
         print("   ❌ 配置更新失败")
 
 
+@batched_output
 def broker_config_example():
     """经纪商配置示例"""
     print("\n" + "=" * 60)
@@ -116,14 +120,15 @@ def broker_config_example():
         }
     }
 
-    print("
-🔧 配置华泰证券:"    print(f"   - 应用密钥: {huatai_config['broker']['huatai']['app_key'][:10]}...")
+    print("\n🔧 配置华泰证券:")
+    print(f"   - 应用密钥: {huatai_config['broker']['huatai']['app_key'][:10]}...")
     print(f"   - 账户ID: {huatai_config['broker']['huatai']['account_id']}")
     print(f"   - 环境: {'生产环境' if not huatai_config['broker']['huatai']['sandbox'] else '沙箱环境'}")
 
     # 这里可以调用update_config(huatai_config)来应用配置
 
 
+@batched_output
 def web_interface_config_example():
     """Web界面配置示例"""
     print("\n" + "=" * 60)
@@ -138,11 +143,12 @@ def web_interface_config_example():
     print(f"   - 调试模式: {config.web_interface.debug}")
     print(f"   - 启用CORS: {config.web_interface.enable_cors}")
 
-    print("
-📊 更新间隔配置:"    for key, value in config.web_interface.update_intervals.items():
+    print("\n📊 更新间隔配置:")
+    for key, value in config.web_interface.update_intervals.items():
         print(f"   - {key}: {value}ms")
 
 
+@batched_output
 def email_config_example():
     """邮件配置示例"""
     print("\n" + "=" * 60)
@@ -157,13 +163,14 @@ def email_config_example():
     print(f"   - 发件人: {config.email_notification.email_user}")
     print(f"   - 发送者名称: {config.email_notification.sender_name}")
 
-    print("
-📬 通知设置:"    for key, value in config.email_notification.notifications.items():
+    print("\n📬 通知设置:")
+    for key, value in config.email_notification.notifications.items():
         print(f"   - {key}: {value}")
 
     print(f"\n👥 收件人列表: {config.email_notification.recipients}")
 
 
+@batched_output
 def config_file_operations():
     """配置文件操作示例"""
     print("\n" + "=" * 60)
@@ -175,21 +182,21 @@ def config_file_operations():
 
     print("📂 配置文件路径:")
     print(f"   - 项目根目录: {project_root}")
-    print(f"   - 默认配置: {project_root / 'config' / 'default_config.yaml'}")
+    print(f"   - 默认配置: {project_root / 'config' / 'default_config.toml'}")
     print(f"   - 用户配置: {project_root / 'config' / 'user_config.yaml'}")
     print(f"   - 配置模板: {project_root / 'config' / 'user_config_template.yaml'}")
 
     # 检查配置文件是否存在
     user_config_file = project_root / 'config' / 'user_config.yaml'
     if not user_config_file.exists():
-        print("
-💡 建议:"        print(f"   - 复制配置模板到用户配置文件: {user_config_file}")
-        print("   - 修改用户配置文件以适应你的需求"
+        print("\n💡 建议:")
+        print(f"   - 复制配置模板到用户配置文件: {user_config_file}")
+        print("   - 修改用户配置文件以适应你的需求")
     else:
-        print("   ✅ 用户配置文件已存在"
+        print("   ✅ 用户配置文件已存在")
     # 显示配置验证结果
-    print("
-🔍 配置验证:"    errors = validate_config()
+    print("\n🔍 配置验证:")
+    errors = validate_config()
     if errors:
         print(f"   ❌ 发现 {len(errors)} 个配置错误:")
         for error in errors:
@@ -198,6 +205,7 @@ def config_file_operations():
         print("   ✅ 配置验证通过")
 
 
+@batched_output
 def save_and_load_example():
     """保存和加载配置示例"""
     print("\n" + "=" * 60)
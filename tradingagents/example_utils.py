@@ -0,0 +1,28 @@
+"""
+示例脚本公用工具
+"""
+
+import functools
+import io
+import sys
+from contextlib import redirect_stdout
+
+
+def batched_output(func):
+    """
+    将示例函数的全部输出缓冲后一次性写入stdout，避免逐行print产生多次写调用
+
+    只缓冲stdout：函数执行期间的logging输出（默认写入stderr）会先于该函数的print内容出现，
+    耗时较长的示例在返回前也不会显示任何输出。示例脚本只关心最终输出，接受这种顺序变化。
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        buffer = io.StringIO()
+        try:
+            with redirect_stdout(buffer):
+                return func(*args, **kwargs)
+        finally:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+    return wrapper
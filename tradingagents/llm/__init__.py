@@ -5,6 +5,7 @@
 
 from .llm_factory import (
     LLMFactory,
+    LLMKey,
     LLMPerformanceMetrics,
     LLMCircuitBreaker,
     get_llm_for_agent,
@@ -13,6 +14,15 @@ from .llm_factory import (
     get_llm_health_report,
     get_agent_llm_mapping
 )
+from .response_cache import (
+    LLMCache,
+    CachedLLM,
+    SemanticCache,
+    MemoryCacheBackend,
+    FileCacheBackend,
+    RedisCacheBackend
+)
+from .prompt_cache import mark_system_prompt_cacheable, prompt_cache_runnable
 
 # 全局LLM工厂实例
 from .llm_factory import llm_factory
@@ -22,9 +32,22 @@ __version__ = "1.0.0"
 __all__ = [
     # 核心类
     "LLMFactory",
+    "LLMKey",
     "LLMPerformanceMetrics",
     "LLMCircuitBreaker",
 
+    # 响应缓存
+    "LLMCache",
+    "CachedLLM",
+    "SemanticCache",
+    "MemoryCacheBackend",
+    "FileCacheBackend",
+    "RedisCacheBackend",
+
+    # 提示缓存
+    "mark_system_prompt_cacheable",
+    "prompt_cache_runnable",
+
     # 便捷函数
     "get_llm_for_agent",
     "record_llm_usage",
@@ -4,27 +4,78 @@
 """
 
 import logging
+import queue
 import time
 import threading
-from typing import Dict, List, Optional, Any, Union
+import weakref
+from typing import Dict, List, Mapping, NamedTuple, Optional, Any, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict
 import asyncio
+import copy
+import functools
+import importlib
+from contextlib import ExitStack
+from types import MappingProxyType
 
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
+import numpy as np
 
 # 导入配置管理器
-from ..config.config_manager import get_config
+from ..config.config_manager import get_config, reload_config
+from .response_cache import CACHE_BACKENDS, CachedLLM, LLMCache, SemanticCache
+from .prompt_cache import prompt_cache_runnable
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# 健康评分参数
+HEALTHY_SCORE_THRESHOLD = 0.8
+FAILURE_PENALTY_PER_FAILURE = 0.1
+FAILURE_PENALTY_CAP = 0.3
+TIME_PENALTY_SCALE = 0.1 / 10.0  # 平均响应时间每10秒扣0.1分
+TIME_PENALTY_CAP = 0.2
+
+
+def compute_health_scores(total_requests, successful_requests, consecutive_failures, total_response_time):
+    """
+    批量计算健康评分 (0-1)
+
+    参数可以是NumPy数组或标量，基于成功率、平均响应时间和连续失败次数计算，无请求时评分为1.0
+    """
+    total_requests = np.asarray(total_requests)
+    has_requests = total_requests > 0
+    divisor = np.maximum(total_requests, 1)
+
+    success_rate = successful_requests / divisor
+    failure_penalty = np.minimum(FAILURE_PENALTY_CAP, consecutive_failures * FAILURE_PENALTY_PER_FAILURE)
+    time_penalty = np.minimum(TIME_PENALTY_CAP, (total_response_time / divisor) * TIME_PENALTY_SCALE)
+
+    scores = np.maximum(0.0, success_rate - failure_penalty - time_penalty)
+    return np.where(has_requests, scores, 1.0)
+
+
+class LLMKey(NamedTuple):
+    """LLM缓存键"""
+    agent: str
+    provider: str
+    model: str
+
+    @property
+    def llm_type(self) -> str:
+        """供应商与模型组合标识，如 openai:gpt-4o"""
+        return f"{self.provider}:{self.model}"
+
+
+@functools.lru_cache(maxsize=64)
+def _llm_key_for(agent_type: str, provider: str, model: str) -> LLMKey:
+    """生成并复用LLM缓存键，相同组合始终返回同一个LLMKey对象"""
+    return LLMKey(agent_type, provider, model)
+
+
+@dataclass(slots=True)
 class LLMPerformanceMetrics:
     """LLM性能指标"""
     total_requests: int = 0
@@ -32,7 +83,7 @@ class LLMPerformanceMetrics:
     failed_requests: int = 0
     total_response_time: float = 0.0
     average_response_time: float = 0.0
-    last_request_time: Optional[datetime] = None
+    last_request_time: float = 0.0  # time.monotonic() 时间戳，输出报告时再转换为墙上时间
     error_count: int = 0
     consecutive_failures: int = 0
 
@@ -46,7 +97,7 @@ class LLMPerformanceMetrics:
         self.successful_requests += 1
         self.total_response_time += response_time
         self.average_response_time = self.total_response_time / self.total_requests
-        self.last_request_time = datetime.now()
+        self.last_request_time = time.monotonic()
         self.consecutive_failures = 0
 
         if tokens > 0:
@@ -69,61 +120,149 @@ class LLMPerformanceMetrics:
 
     def get_health_score(self) -> float:
         """获取健康评分 (0-1)"""
-        if self.total_requests == 0:
-            return 1.0
-
-        # 基于成功率、响应时间和连续失败次数计算健康评分
-        success_score = self.get_success_rate()
-        failure_penalty = min(0.3, self.consecutive_failures * 0.1)
-        time_penalty = min(0.2, (self.average_response_time / 10.0) * 0.1)
+        return float(compute_health_scores(
+            self.total_requests, self.successful_requests,
+            self.consecutive_failures, self.average_response_time * self.total_requests
+        ))
 
-        return max(0.0, success_score - failure_penalty - time_penalty)
 
-
-@dataclass
+@dataclass(slots=True)
 class LLMCircuitBreaker:
     """LLM熔断器"""
     failure_threshold: int = 5
-    recovery_timeout: int = 60  # 秒
-    failure_timestamps: deque = field(default_factory=deque)
+    recovery_timeout: int = 60  # 秒，首次熔断时长
+    max_backoff_multiplier: int = 12  # 重复熔断时熔断时长按2x、4x、8x递增，最多12x
+
+    fails: int = field(default=0, init=False)  # 连续失败次数
+    open_until: float = field(default=0.0, init=False)  # 熔断结束时间（单调时钟）
+    _trips: int = field(default=0, init=False, repr=False)
 
     def can_proceed(self) -> bool:
         """检查是否可以继续请求"""
-        now = time.time()
-
-        # 移除过期的失败记录
-        while self.failure_timestamps and now - self.failure_timestamps[0] > self.recovery_timeout:
-            self.failure_timestamps.popleft()
-
-        return len(self.failure_timestamps) < self.failure_threshold
+        return time.monotonic() >= self.open_until
 
     def record_failure(self):
         """记录失败"""
-        self.failure_timestamps.append(time.time())
+        self.fails += 1
+        if self.fails < self.failure_threshold:
+            return
+
+        now = time.monotonic()
+        if now >= self.open_until:
+            # 熔断结束后仍然失败，以更长的熔断时长重新熔断
+            multiplier = min(1 << self._trips, self.max_backoff_multiplier)
+            self.open_until = now + self.recovery_timeout * multiplier
+            self._trips = min(self._trips + 1, 4)
+
+    def record_success(self):
+        """记录成功，重置连续失败次数和退避倍数（熔断期间的成功不计入，避免退避无法递增）"""
+        if self.fails and time.monotonic() >= self.open_until:
+            self.fails = 0
+            self._trips = 0
 
     def get_failure_count(self) -> int:
-        """获取当前失败次数"""
-        return len(self.failure_timestamps)
+        """获取当前连续失败次数"""
+        return self.fails
 
 
 class LLMFactory:
     """LLM工厂 - 集中式多供应商管理"""
 
-    def __init__(self):
-        """初始化LLM工厂"""
+    # 分段锁数量，必须为2的幂
+    LOCK_STRIPES = 16
+
+    # 性能指标数组初始容量，超出时按倍数扩容
+    INITIAL_METRIC_CAPACITY = 64
+
+    # 后台线程汇总指标队列的间隔（秒）
+    METRIC_FLUSH_INTERVAL = 0.1
+
+    # 健康检查和性能报告的结果缓存时间（秒）
+    HEALTH_CHECK_TTL = 1.0
+    PERFORMANCE_REPORT_TTL = 2.0
+
+    # 智能体类型到配置分组的映射，智能体未单独配置时回退到对应分组
+    AGENT_CONFIG_FALLBACKS = {
+        # 分析师
+        'market_analyst': 'analysts',
+        'fundamentals_analyst': 'analysts',
+        'news_analyst': 'analysts',
+        'social_media_analyst': 'analysts',
+
+        # 研究员
+        'bull_researcher': 'researchers',
+        'bear_researcher': 'researchers',
+
+        # 经理
+        'research_manager': 'researchers',
+        'risk_judge': 'risk_manager',
+
+        # 风险分析师
+        'risky_analyst': 'risk_manager',
+        'safe_analyst': 'risk_manager',
+        'neutral_analyst': 'risk_manager',
+
+        # 交易员
+        'trader': 'default',
+    }
+
+    # 语义缓存只用于低温度的智能体，高温度输出本身就不要求稳定
+    SEMANTIC_CACHE_MAX_TEMPERATURE = 0.3
+
+    def __init__(
+        self,
+        eager_init: Optional[bool] = None,
+        response_cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticCache] = None
+    ):
+        """
+        初始化LLM工厂
+
+        Args:
+            eager_init: 是否在初始化时预创建所有智能体的LLM实例，为None时读取配置 llm.eager_init（默认禁用，
+                可随后调用warmup()预创建）
+            response_cache: temperature为0的LLM使用的响应缓存，为None时按配置 llm.response_cache 创建
+            semantic_cache: 语义缓存，为None时按配置 llm.semantic_cache 创建（默认禁用）
+        """
         self.config = get_config()
-        self.llm_instances: Dict[str, Any] = {}  # 缓存LLM实例
-        self.performance_metrics: Dict[str, LLMPerformanceMetrics] = {}
-        self.circuit_breakers: Dict[str, LLMCircuitBreaker] = {}
-        self._lock = threading.Lock()
+        self.llm_instances: Dict[LLMKey, Any] = {}  # 缓存LLM实例
+        self.circuit_breakers: Dict[LLMKey, LLMCircuitBreaker] = {}
+        # 分段锁：实例创建按llm_key哈希分配，指标写入按槽位分配，互不相关的智能体可并发执行
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        # 全局锁仅用于重新加载配置和清理缓存
+        self._config_lock = threading.Lock()
+
+        # 指标记录只入队，由后台线程定期批量写入，调用方不参与加锁
+        self._usage_queue: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._flush_lock = threading.Lock()
+        self._flush_thread: Optional[threading.Thread] = None
+
+        # 性能指标以列式数组存储（每个llm_key占一个槽位）
+        self._init_metric_arrays(self.INITIAL_METRIC_CAPACITY)
 
-        # 支持的供应商映射
+        # 报告结果缓存: (生成时间, 结果)
+        self._health_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+        self._report_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+
+        # 单调时钟到墙上时间的偏移量，仅在生成报告时使用
+        self._monotonic_to_wall_offset = time.time() - time.monotonic()
+
+        # 支持的供应商映射（模块路径, 类名），首次使用时才导入对应SDK
         self.provider_classes = {
-            'openai': ChatOpenAI,
-            'anthropic': ChatAnthropic,
-            'google': ChatGoogleGenerativeAI,
+            'openai': ('langchain_openai', 'ChatOpenAI'),
+            'anthropic': ('langchain_anthropic', 'ChatAnthropic'),
+            'google': ('langchain_google_genai', 'ChatGoogleGenerativeAI'),
         }
 
+        # 预计算智能体配置和缓存键
+        self._build_agent_config_cache()
+
+        # 确定性请求的响应缓存
+        self.response_cache = response_cache if response_cache is not None else self._create_response_cache()
+        if semantic_cache is None and self.config.llm.get('semantic_cache', False):
+            semantic_cache = SemanticCache(threshold=self.config.llm.get('semantic_cache_threshold', 0.92))
+        self.semantic_cache = semantic_cache
+
         # 成本估算配置（每1000tokens的美元成本）
         self.cost_per_1k_tokens = {
             'gpt-4o': 0.03,
@@ -134,8 +273,41 @@ class LLMFactory:
             'gemini-pro': 0.0025,
         }
 
+        # 模型编号 -> 每1000tokens成本，编号0保留给未知模型（成本为0）
+        self._model_ids: Dict[str, int] = {
+            model: model_id for model_id, model in enumerate(self.cost_per_1k_tokens, start=1)
+        }
+        self._cost_arr = np.array([0.0, *self.cost_per_1k_tokens.values()], dtype=np.float64)
+
+        # 预创建LLM实例，避免多个智能体首次调用时集中创建；默认按需创建，导入模块时不加载供应商SDK
+        self.eager_init = self.config.llm.get('eager_init', False) if eager_init is None else eager_init
+        if self.eager_init:
+            self.warmup()
+
         logger.info("LLM工厂初始化完成")
 
+    def _create_response_cache(self) -> Optional[LLMCache]:
+        """根据配置创建响应缓存，llm.response_cache 为false时禁用"""
+        backend_name = self.config.llm.get('response_cache', 'memory')
+        if not backend_name:
+            return None
+
+        try:
+            backend = CACHE_BACKENDS[backend_name]()
+        except Exception as e:
+            logger.warning(f"创建LLM响应缓存失败，已禁用缓存: {str(e)}")
+            return None
+
+        return LLMCache(backend, ttl=self.config.llm.get('response_cache_ttl', 3600.0))
+
+    def warmup(self):
+        """为所有已知智能体预创建LLM实例"""
+        for agent_type in self.AGENT_CONFIG_FALLBACKS:
+            try:
+                self.get_llm_for_agent(agent_type)
+            except Exception as e:
+                logger.warning(f"预创建智能体 {agent_type} 的LLM实例失败: {str(e)}")
+
     def get_llm_for_agent(self, agent_type: str) -> Any:
         """
         为指定智能体获取对应的LLM实例
@@ -150,51 +322,170 @@ class LLMFactory:
         agent_config = self._get_agent_llm_config(agent_type)
 
         # 检查熔断器
-        if not self._check_circuit_breaker(agent_type):
+        if self._check_circuit_breaker(agent_type):
+            llm_key = self._get_agent_llm_key(agent_type)
+        else:
             logger.warning(f"智能体 {agent_type} LLM熔断器激活，使用备用配置")
-            # 使用默认配置作为备用
-            agent_config = self.config.llm.get('default', self.config.llm['analysts'])
+            agent_config = self._get_fallback_llm_config()
+            llm_key = self._get_llm_key(agent_type, agent_config)
 
         # 获取或创建LLM实例
-        llm_key = self._get_llm_key(agent_type, agent_config)
+        llm = self.llm_instances.get(llm_key)
+        if llm is not None:
+            return llm
 
-        with self._lock:
-            if llm_key not in self.llm_instances:
-                self.llm_instances[llm_key] = self._create_llm_instance(agent_config)
-                self.performance_metrics[llm_key] = LLMPerformanceMetrics()
+        # 分配指标槽位可能需要扩容，必须在持有分段锁之前完成
+        self._allocate_metric_slot(llm_key)
+
+        with self._lock_for(llm_key):
+            llm = self.llm_instances.get(llm_key)
+            if llm is None:
+                llm = self._wrap_with_cache(agent_type, agent_config, self._create_llm_instance(agent_config))
                 self.circuit_breakers[llm_key] = LLMCircuitBreaker()
+                self.llm_instances[llm_key] = llm
 
-        return self.llm_instances[llm_key]
+        return llm
+
+    def get_prompt_cache_step(self, agent_type: str) -> Any:
+        """
+        获取智能体对应供应商的提示缓存标记步骤，插入在提示模板和LLM之间：
+        prompt | llm_factory.get_prompt_cache_step(agent_type) | llm
+        """
+        return prompt_cache_runnable(self._get_agent_llm_config(agent_type).provider)
+
+    def _lock_for(self, llm_key: LLMKey) -> threading.Lock:
+        """获取llm_key对应的分段锁（用于实例创建）"""
+        return self._locks[hash(llm_key) & (self.LOCK_STRIPES - 1)]
+
+    def _all_stripe_locks(self) -> ExitStack:
+        """按固定顺序获取全部分段锁"""
+        stack = ExitStack()
+        for lock in self._locks:
+            stack.enter_context(lock)
+        return stack
+
+    def _init_metric_arrays(self, capacity: int):
+        """初始化列式性能指标数组"""
+        self._metric_index: Dict[LLMKey, int] = {}  # llm_key -> 槽位
+        self._agent_ids: Dict[str, int] = {}  # 智能体类型 -> 分组编号
+        self._llm_type_ids: Dict[str, int] = {}  # 供应商:模型 -> 分组编号
+        self._slot_keys: List[LLMKey] = []  # 槽位 -> llm_key
+
+        # 成本汇总随指标写入增量累加（在_flush_lock下更新）
+        self._total_cost = 0.0
+        self._cost_by_provider: Dict[str, float] = defaultdict(float)
+        self._cost_by_agent: Dict[str, float] = defaultdict(float)
+
+        self._m_agent = np.zeros(capacity, dtype=np.int64)
+        self._m_llm_type = np.zeros(capacity, dtype=np.int64)
+        self._m_model = np.zeros(capacity, dtype=np.int64)
+        self._m_total = np.zeros(capacity, dtype=np.int64)
+        self._m_success = np.zeros(capacity, dtype=np.int64)
+        self._m_failed = np.zeros(capacity, dtype=np.int64)
+        self._m_consecutive = np.zeros(capacity, dtype=np.int64)
+        self._m_rt = np.zeros(capacity, dtype=np.float64)
+        self._m_tokens = np.zeros(capacity, dtype=np.int64)
+        self._m_cost = np.zeros(capacity, dtype=np.float64)
+        self._m_last = np.zeros(capacity, dtype=np.float64)
+
+    def _grow_metric_arrays(self):
+        """指标数组扩容为原来的两倍"""
+        names = ['_m_agent', '_m_llm_type', '_m_model', '_m_total', '_m_success', '_m_failed',
+                 '_m_consecutive', '_m_rt', '_m_tokens', '_m_cost', '_m_last']
+
+        # 扩容期间阻止所有指标写入，避免更新写到旧数组上丢失
+        with self._all_stripe_locks():
+            for name in names:
+                old = getattr(self, name)
+                new = np.zeros(len(old) * 2, dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+
+    def _allocate_metric_slot(self, llm_key: LLMKey) -> int:
+        """为llm_key分配指标槽位"""
+        with self._config_lock:
+            idx = self._metric_index.get(llm_key)
+            if idx is not None:
+                return idx
+
+            idx = len(self._metric_index)
+            if idx >= len(self._m_total):
+                self._grow_metric_arrays()
+
+            self._m_agent[idx] = self._agent_ids.setdefault(llm_key.agent, len(self._agent_ids))
+            self._m_llm_type[idx] = self._llm_type_ids.setdefault(llm_key.llm_type, len(self._llm_type_ids))
+            self._m_model[idx] = self._model_ids.get(llm_key.model, 0)
+            with self._flush_lock:
+                self._slot_keys.append(llm_key)
+                self._cost_by_provider[llm_key.provider] += 0.0
+                self._cost_by_agent[llm_key.agent] += 0.0
+            self._metric_index[llm_key] = idx
+            return idx
+
+    @property
+    def performance_metrics(self) -> Dict[LLMKey, LLMPerformanceMetrics]:
+        """各LLM缓存键的性能指标快照"""
+        self.flush_metrics()
+        snapshot = {}
+        for llm_key, idx in self._metric_index.items():
+            total_requests = int(self._m_total[idx])
+            failed_requests = int(self._m_failed[idx])
+            total_response_time = float(self._m_rt[idx])
+            snapshot[llm_key] = LLMPerformanceMetrics(
+                total_requests=total_requests,
+                successful_requests=int(self._m_success[idx]),
+                failed_requests=failed_requests,
+                total_response_time=total_response_time,
+                average_response_time=total_response_time / total_requests if total_requests else 0.0,
+                last_request_time=float(self._m_last[idx]),
+                error_count=failed_requests,
+                consecutive_failures=int(self._m_consecutive[idx]),
+                total_tokens=int(self._m_tokens[idx]),
+                total_cost=float(self._m_cost[idx])
+            )
+        return snapshot
+
+    def _build_agent_config_cache(self):
+        """预计算各智能体的LLM配置和缓存键"""
+        agent_config_cache = {}
+        llm_key_cache = {}
+        agent_llm_mapping = {}
+
+        for agent_type, fallback in self.AGENT_CONFIG_FALLBACKS.items():
+            agent_config = self.config.llm.get(agent_type, self.config.llm[fallback])
+            agent_config_cache[agent_type] = agent_config
+            llm_key_cache[agent_type] = self._get_llm_key(agent_type, agent_config)
+            agent_llm_mapping[agent_type] = MappingProxyType({
+                'provider': agent_config.provider,
+                'model': agent_config.model,
+                'temperature': agent_config.temperature,
+                'max_tokens': agent_config.max_tokens,
+                'enabled': agent_config.enabled
+            })
+
+        self._agent_config_cache = agent_config_cache
+        self._llm_key_cache = llm_key_cache
+        self._agent_llm_mapping = MappingProxyType(agent_llm_mapping)
 
     def _get_agent_llm_config(self, agent_type: str):
         """获取智能体LLM配置"""
-        # 智能体类型到配置的映射
-        agent_config_map = {
-            # 分析师
-            'market_analyst': self.config.llm.get('market_analyst', self.config.llm['analysts']),
-            'fundamentals_analyst': self.config.llm.get('fundamentals_analyst', self.config.llm['analysts']),
-            'news_analyst': self.config.llm.get('news_analyst', self.config.llm['analysts']),
-            'social_media_analyst': self.config.llm.get('social_media_analyst', self.config.llm['analysts']),
-
-            # 研究员
-            'bull_researcher': self.config.llm.get('bull_researcher', self.config.llm['researchers']),
-            'bear_researcher': self.config.llm.get('bear_researcher', self.config.llm['researchers']),
-
-            # 经理
-            'research_manager': self.config.llm.get('research_manager', self.config.llm['researchers']),
-            'risk_judge': self.config.llm.get('risk_judge', self.config.llm['risk_manager']),
-
-            # 风险分析师
-            'risky_analyst': self.config.llm.get('risky_analyst', self.config.llm['risk_manager']),
-            'safe_analyst': self.config.llm.get('safe_analyst', self.config.llm['risk_manager']),
-            'neutral_analyst': self.config.llm.get('neutral_analyst', self.config.llm['risk_manager']),
-
-            # 交易员
-            'trader': self.config.llm.get('trader', self.config.llm['default']),
-        }
-
         # 返回对应配置，如果没有找到则使用默认配置
-        return agent_config_map.get(agent_type, self.config.llm['default'])
+        agent_config = self._agent_config_cache.get(agent_type)
+        if agent_config is None:
+            agent_config = self.config.llm['default']
+        return agent_config
+
+    def _get_fallback_llm_config(self):
+        """获取熔断期间使用的备用LLM配置（默认配置）"""
+        return self.config.llm.get('default', self.config.llm['analysts'])
+
+    def _get_agent_llm_key(self, agent_type: str) -> LLMKey:
+        """获取智能体对应的LLM缓存键"""
+        llm_key = self._llm_key_cache.get(agent_type)
+        if llm_key is None:
+            llm_key = self._get_llm_key(agent_type, self._get_agent_llm_config(agent_type))
+            self._llm_key_cache[agent_type] = llm_key
+        return llm_key
 
     def _create_llm_instance(self, agent_config) -> Any:
         """创建LLM实例"""
@@ -205,9 +496,11 @@ class LLMFactory:
             if provider not in self.provider_classes:
                 raise ValueError(f"不支持的LLM供应商: {provider}")
 
+            llm_class = self._get_provider_class(provider)
+
             # 根据供应商创建对应实例
             if provider == 'openai':
-                llm = ChatOpenAI(
+                llm = llm_class(
                     model=model,
                     base_url=agent_config.backend_url,
                     temperature=agent_config.temperature,
@@ -220,7 +513,7 @@ class LLMFactory:
                 )
 
             elif provider == 'anthropic':
-                llm = ChatAnthropic(
+                llm = llm_class(
                     model=model,
                     base_url=agent_config.backend_url,
                     temperature=agent_config.temperature,
@@ -230,7 +523,7 @@ class LLMFactory:
                 )
 
             elif provider == 'google':
-                llm = ChatGoogleGenerativeAI(
+                llm = llm_class(
                     model=model,
                     temperature=agent_config.temperature,
                     max_tokens=agent_config.max_tokens,
@@ -245,14 +538,49 @@ class LLMFactory:
             logger.error(f"创建LLM实例失败: {str(e)}")
             raise
 
-    def _get_llm_key(self, agent_type: str, agent_config) -> str:
+    def _wrap_with_cache(self, agent_type: str, agent_config, llm: Any) -> Any:
+        """按温度和智能体白名单为LLM实例包装响应缓存"""
+        # 确定性请求结果可复用，使用精确缓存
+        cache = self.response_cache if agent_config.temperature == 0 else None
+
+        semantic_cache = None
+        if (self.semantic_cache is not None
+                and agent_config.temperature <= self.SEMANTIC_CACHE_MAX_TEMPERATURE
+                and agent_type in self.config.llm.get('semantic_cache_agents', ())):
+            semantic_cache = self.semantic_cache
+
+        if cache is None and semantic_cache is None:
+            return llm
+
+        provider = agent_config.provider.lower()
+        return CachedLLM(
+            llm, cache, provider, agent_config.model,
+            semantic_cache=semantic_cache,
+            namespace=f"{agent_type}:{provider}:{agent_config.model}"
+        )
+
+    def _get_provider_class(self, provider: str):
+        """获取供应商LLM类，首次调用时导入并缓存"""
+        provider_class = self.provider_classes[provider]
+        if isinstance(provider_class, tuple):
+            module_name, class_name = provider_class
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+            self.provider_classes[provider] = provider_class
+        return provider_class
+
+    def _to_wall_time(self, monotonic_ts: float) -> Optional[str]:
+        """将单调时钟时间戳转换为墙上时间字符串"""
+        if not monotonic_ts:
+            return None
+        return datetime.fromtimestamp(monotonic_ts + self._monotonic_to_wall_offset).isoformat()
+
+    def _get_llm_key(self, agent_type: str, agent_config) -> LLMKey:
         """生成LLM缓存键"""
-        return f"{agent_type}:{agent_config.provider}:{agent_config.model}"
+        return _llm_key_for(agent_type, agent_config.provider, agent_config.model)
 
     def _check_circuit_breaker(self, agent_type: str) -> bool:
         """检查熔断器状态"""
-        agent_config = self._get_agent_llm_config(agent_type)
-        llm_key = self._get_llm_key(agent_type, agent_config)
+        llm_key = self._get_agent_llm_key(agent_type)
 
         circuit_breaker = self.circuit_breakers.get(llm_key)
         if circuit_breaker:
@@ -261,33 +589,131 @@ class LLMFactory:
 
     def record_llm_performance(self, agent_type: str, success: bool, response_time: float, tokens: int = 0):
         """记录LLM性能指标"""
-        agent_config = self._get_agent_llm_config(agent_type)
-        llm_key = self._get_llm_key(agent_type, agent_config)
-
-        with self._lock:
-            metrics = self.performance_metrics.get(llm_key)
-            if metrics:
-                if success:
-                    # 估算成本
-                    cost = self._estimate_cost(agent_config.model, tokens)
-                    metrics.update_success(response_time, tokens, cost)
-                else:
-                    metrics.update_failure()
-                    # 记录熔断器失败
-                    circuit_breaker = self.circuit_breakers.get(llm_key)
-                    if circuit_breaker:
-                        circuit_breaker.record_failure()
-
-    def _estimate_cost(self, model: str, tokens: int) -> float:
+        llm_key = self._get_agent_llm_key(agent_type)
+
+        # 熔断期间get_llm_for_agent返回的是备用LLM，指标记到实际使用的实例上
+        circuit_breaker = self.circuit_breakers.get(llm_key)
+        if circuit_breaker and not circuit_breaker.can_proceed():
+            llm_key = self._get_llm_key(agent_type, self._get_fallback_llm_config())
+            circuit_breaker = self.circuit_breakers.get(llm_key)
+
+        idx = self._metric_index.get(llm_key)
+        if idx is None:
+            return
+
+        # 熔断器需要及时感知成功和失败，不经过缓冲区
+        if circuit_breaker:
+            if success:
+                circuit_breaker.record_success()
+            elif not circuit_breaker.can_proceed():
+                # 熔断期间的失败只计数，不再写入性能指标
+                circuit_breaker.record_failure()
+                return
+            else:
+                circuit_breaker.record_failure()
+
+        self._usage_queue.put_nowait((idx, success, response_time, tokens, time.monotonic()))
+        if self._flush_thread is None:
+            self._start_flush_thread()
+
+    def _start_flush_thread(self):
+        """启动后台指标汇总线程（首次记录指标时调用）"""
+        with self._flush_lock:
+            if self._flush_thread is not None:
+                return
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, args=(weakref.ref(self),),
+                name="llm-metrics-flush", daemon=True
+            )
+            self._flush_thread.start()
+
+    @staticmethod
+    def _flush_loop(factory_ref: "weakref.ref[LLMFactory]"):
+        """定期汇总指标队列，工厂被回收后退出"""
+        while True:
+            time.sleep(LLMFactory.METRIC_FLUSH_INTERVAL)
+            factory = factory_ref()
+            if factory is None:
+                return
+            try:
+                factory.flush_metrics()
+            except Exception as e:
+                logger.error(f"汇总LLM性能指标失败: {str(e)}")
+            del factory
+
+    def _drain_usage_queue(self) -> list:
+        """取出指标队列中的全部记录"""
+        batch = []
+        try:
+            while True:
+                batch.append(self._usage_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _apply_metric_batch(self, batch: list):
+        """将一批指标记录写入列式数组（调用方持有_flush_lock）"""
+        # 按分段锁分组，每个分段只加锁一次；clear_cache期间入队的记录可能指向已不存在的槽位，直接丢弃
+        n_slots = len(self._slot_keys)
+        batch_by_stripe = defaultdict(list)
+        for entry in batch:
+            if entry[0] < n_slots:
+                batch_by_stripe[entry[0] & (self.LOCK_STRIPES - 1)].append(entry)
+
+        batch_cost_by_slot = defaultdict(float)
+
+        for stripe, entries in batch_by_stripe.items():
+            with self._locks[stripe]:
+                for idx, success, response_time, tokens, timestamp in entries:
+                    self._m_total[idx] += 1
+                    if success:
+                        self._m_success[idx] += 1
+                        self._m_rt[idx] += response_time
+                        self._m_last[idx] = timestamp
+                        self._m_consecutive[idx] = 0
+                        if tokens > 0:
+                            self._m_tokens[idx] += tokens
+                            # 估算成本
+                            cost = float(self._estimate_cost(self._m_model[idx], tokens))
+                            self._m_cost[idx] += cost
+                            batch_cost_by_slot[idx] += cost
+                    else:
+                        self._m_failed[idx] += 1
+                        self._m_consecutive[idx] += 1
+
+        # 更新成本汇总
+        for idx, cost in batch_cost_by_slot.items():
+            llm_key = self._slot_keys[idx]
+            self._total_cost += cost
+            self._cost_by_provider[llm_key.provider] += cost
+            self._cost_by_agent[llm_key.agent] += cost
+
+    def _flush_locked(self):
+        """取出队列中的指标并写入列式数组（调用方持有_flush_lock）"""
+        batch = self._drain_usage_queue()
+        if batch:
+            self._apply_metric_batch(batch)
+
+    def flush_metrics(self):
+        """立即写入队列中尚未汇总的指标"""
+        with self._flush_lock:
+            self._flush_locked()
+
+    def _estimate_cost(self, model_id: int, tokens: int) -> float:
         """估算LLM使用成本"""
-        if model in self.cost_per_1k_tokens and tokens > 0:
-            return (tokens / 1000) * self.cost_per_1k_tokens[model]
-        return 0.0
+        return (tokens / 1000) * self._cost_arr[model_id]
 
     def get_performance_report(self) -> Dict[str, Any]:
-        """获取性能报告"""
+        """获取性能报告（缓存结果的副本，调用方可自由修改或序列化）"""
+        now = time.monotonic()
+        cached_at, cached_report = self._report_cache
+        if cached_report is not None and now - cached_at < self.PERFORMANCE_REPORT_TTL:
+            return copy.deepcopy(cached_report)
+
+        self.flush_metrics()
+        n = len(self._metric_index)
         report = {
-            'total_agents': len(set(key.split(':')[0] for key in self.performance_metrics.keys())),
+            'total_agents': len(self._agent_ids),
             'total_llm_instances': len(self.llm_instances),
             'performance_by_agent': {},
             'performance_by_llm': {},
@@ -297,89 +723,81 @@ class LLMFactory:
             }
         }
 
+        total = self._m_total[:n]
+        success = self._m_success[:n]
+        cost = self._m_cost[:n]
+        tokens = self._m_tokens[:n]
+
         # 按智能体统计性能
-        agent_metrics = defaultdict(list)
-        for llm_key, metrics in self.performance_metrics.items():
-            agent_type = llm_key.split(':')[0]
-            agent_metrics[agent_type].append(metrics)
-
-        for agent_type, metrics_list in agent_metrics.items():
-            if metrics_list:
-                total_metrics = LLMPerformanceMetrics()
-                for metrics in metrics_list:
-                    total_metrics.total_requests += metrics.total_requests
-                    total_metrics.successful_requests += metrics.successful_requests
-                    total_metrics.failed_requests += metrics.failed_requests
-                    total_metrics.total_response_time += metrics.total_response_time
-                    total_metrics.total_tokens += metrics.total_tokens
-                    total_metrics.total_cost += metrics.total_cost
-
-                if total_metrics.total_requests > 0:
-                    total_metrics.average_response_time = total_metrics.total_response_time / total_metrics.total_requests
-
-                report['performance_by_agent'][agent_type] = {
-                    'total_requests': total_metrics.total_requests,
-                    'success_rate': total_metrics.get_success_rate(),
-                    'avg_response_time': total_metrics.average_response_time,
-                    'total_cost': total_metrics.total_cost,
-                    'total_tokens': total_metrics.total_tokens
-                }
+        agent_ids = self._m_agent[:n]
+        n_agents = len(self._agent_ids)
+        agent_total = np.bincount(agent_ids, weights=total, minlength=n_agents)
+        agent_success = np.bincount(agent_ids, weights=success, minlength=n_agents)
+        agent_rt = np.bincount(agent_ids, weights=self._m_rt[:n], minlength=n_agents)
+        agent_tokens = np.bincount(agent_ids, weights=tokens, minlength=n_agents)
+        agent_cost = np.bincount(agent_ids, weights=cost, minlength=n_agents)
+        agent_last = np.zeros(n_agents, dtype=np.float64)
+        np.maximum.at(agent_last, agent_ids, self._m_last[:n])
+
+        for agent_type, agent_id in self._agent_ids.items():
+            total_requests = int(agent_total[agent_id])
+            report['performance_by_agent'][agent_type] = {
+                'total_requests': total_requests,
+                'success_rate': float(agent_success[agent_id] / total_requests) if total_requests else 1.0,
+                'avg_response_time': float(agent_rt[agent_id] / total_requests) if total_requests else 0.0,
+                'total_cost': float(agent_cost[agent_id]),
+                'total_tokens': int(agent_tokens[agent_id]),
+                'last_request_time': self._to_wall_time(float(agent_last[agent_id]))
+            }
 
         # 按LLM统计性能
-        llm_metrics = defaultdict(list)
-        for llm_key, metrics in self.performance_metrics.items():
-            llm_type = ':'.join(llm_key.split(':')[1:])
-            llm_metrics[llm_type].append(metrics)
-
-        for llm_type, metrics_list in llm_metrics.items():
-            if metrics_list:
-                total_metrics = LLMPerformanceMetrics()
-                for metrics in metrics_list:
-                    total_metrics.total_requests += metrics.total_requests
-                    total_metrics.successful_requests += metrics.successful_requests
-                    total_metrics.total_cost += metrics.total_cost
-
-                if total_metrics.total_requests > 0:
-                    report['performance_by_llm'][llm_type] = {
-                        'total_requests': total_metrics.total_requests,
-                        'success_rate': total_metrics.get_success_rate(),
-                        'total_cost': total_metrics.total_cost
-                    }
+        llm_type_ids = self._m_llm_type[:n]
+        n_llm_types = len(self._llm_type_ids)
+        llm_total = np.bincount(llm_type_ids, weights=total, minlength=n_llm_types)
+        llm_success = np.bincount(llm_type_ids, weights=success, minlength=n_llm_types)
+        llm_cost = np.bincount(llm_type_ids, weights=cost, minlength=n_llm_types)
+
+        for llm_type, llm_type_id in self._llm_type_ids.items():
+            total_requests = int(llm_total[llm_type_id])
+            if total_requests > 0:
+                report['performance_by_llm'][llm_type] = {
+                    'total_requests': total_requests,
+                    'success_rate': float(llm_success[llm_type_id] / total_requests),
+                    'total_cost': float(llm_cost[llm_type_id])
+                }
 
         # 总成本统计
-        report['cost_summary']['total_cost'] = sum(
-            metrics.total_cost for metrics in self.performance_metrics.values()
-        )
-        report['cost_summary']['total_tokens'] = sum(
-            metrics.total_tokens for metrics in self.performance_metrics.values()
+        report['cost_summary']['total_cost'] = float(cost.sum())
+        report['cost_summary']['total_tokens'] = int(tokens.sum())
+
+        # 响应缓存统计
+        if self.response_cache is not None:
+            report['response_cache'] = self.response_cache.get_stats()
+        if self.semantic_cache is not None:
+            report['semantic_cache'] = self.semantic_cache.get_stats()
+
+        self._report_cache = (now, report)
+        return copy.deepcopy(report)
+
+    def get_agent_llm_mapping(self) -> Mapping[str, Mapping[str, Any]]:
+        """获取智能体LLM映射（只读视图，随reload_config重建）"""
+        return self._agent_llm_mapping
+
+    def health_scores_vectorized(self) -> np.ndarray:
+        """按槽位顺序一次性计算所有llm_key的健康评分"""
+        self.flush_metrics()
+        n = len(self._metric_index)
+        return compute_health_scores(
+            self._m_total[:n], self._m_success[:n], self._m_consecutive[:n], self._m_rt[:n]
         )
 
-        return report
-
-    def get_agent_llm_mapping(self) -> Dict[str, Dict[str, Any]]:
-        """获取智能体LLM映射"""
-        mapping = {}
-
-        agent_types = [
-            'market_analyst', 'fundamentals_analyst', 'news_analyst', 'social_media_analyst',
-            'bull_researcher', 'bear_researcher', 'research_manager', 'trader',
-            'risky_analyst', 'safe_analyst', 'neutral_analyst', 'risk_judge'
-        ]
-
-        for agent_type in agent_types:
-            config = self._get_agent_llm_config(agent_type)
-            mapping[agent_type] = {
-                'provider': config.provider,
-                'model': config.model,
-                'temperature': config.temperature,
-                'max_tokens': config.max_tokens,
-                'enabled': config.enabled
-            }
-
-        return mapping
-
     def health_check(self) -> Dict[str, Any]:
         """健康检查"""
+        now = time.monotonic()
+        cached_at, cached_report = self._health_cache
+        if cached_report is not None and now - cached_at < self.HEALTH_CHECK_TTL:
+            return copy.deepcopy(cached_report)
+
         health_report = {
             'overall_health': 'healthy',
             'healthy_agents': [],
@@ -387,24 +805,24 @@ class LLMFactory:
             'circuit_breaker_trips': []
         }
 
-        for llm_key, metrics in self.performance_metrics.items():
-            agent_type = llm_key.split(':')[0]
-            health_score = metrics.get_health_score()
+        scores = self.health_scores_vectorized()
+        llm_keys = list(self._metric_index)  # 槽位按插入顺序分配，与索引一一对应
+        healthy = scores >= HEALTHY_SCORE_THRESHOLD
 
-            if health_score >= 0.8:
-                health_report['healthy_agents'].append(agent_type)
-            else:
-                health_report['unhealthy_agents'].append({
-                    'agent': agent_type,
-                    'health_score': health_score,
-                    'success_rate': metrics.get_success_rate(),
-                    'consecutive_failures': metrics.consecutive_failures
-                })
+        health_report['healthy_agents'] = [llm_keys[idx].agent for idx in np.flatnonzero(healthy)]
+        for idx in np.flatnonzero(~healthy):
+            total_requests = int(self._m_total[idx])
+            health_report['unhealthy_agents'].append({
+                'agent': llm_keys[idx].agent,
+                'health_score': float(scores[idx]),
+                'success_rate': self._m_success[idx] / total_requests if total_requests else 1.0,
+                'consecutive_failures': int(self._m_consecutive[idx])
+            })
 
         # 检查熔断器状态
         for llm_key, circuit_breaker in self.circuit_breakers.items():
             if not circuit_breaker.can_proceed():
-                agent_type = llm_key.split(':')[0]
+                agent_type = llm_key.agent
                 health_report['circuit_breaker_trips'].append({
                     'agent': agent_type,
                     'failure_count': circuit_breaker.get_failure_count()
@@ -416,45 +834,56 @@ class LLMFactory:
         if len(health_report['unhealthy_agents']) > len(health_report['healthy_agents']):
             health_report['overall_health'] = 'unhealthy'
 
-        return health_report
+        self._health_cache = (now, health_report)
+        return copy.deepcopy(health_report)
 
     def reload_config(self):
         """重新加载配置"""
-        with self._lock:
-            self.config = get_config()
+        with self._config_lock:
+            self.config = reload_config()
+            _llm_key_for.cache_clear()
+            self._build_agent_config_cache()
+            self.llm_instances.clear()
+            self._invalidate_report_cache()
             logger.info("LLM工厂配置已重新加载")
 
+        if self.eager_init:
+            self.warmup()
+
     def clear_cache(self):
         """清理LLM缓存"""
-        with self._lock:
+        with self._config_lock:
             self.llm_instances.clear()
-            self.performance_metrics.clear()
+            # 熔断器随实例一起重建，避免旧的熔断状态继续把请求导向备用配置
+            self.circuit_breakers.clear()
+            _llm_key_for.cache_clear()
+            with self._flush_lock, self._all_stripe_locks():
+                # 丢弃队列中指向旧槽位的指标
+                self._drain_usage_queue()
+                self._init_metric_arrays(self.INITIAL_METRIC_CAPACITY)
+            if self.response_cache is not None:
+                self.response_cache.clear()
+            if self.semantic_cache is not None:
+                self.semantic_cache.clear()
+            self._invalidate_report_cache()
             logger.info("LLM缓存已清理")
 
+    def _invalidate_report_cache(self):
+        """使健康检查和性能报告缓存失效"""
+        self._health_cache = (0.0, None)
+        self._report_cache = (0.0, None)
+
     def get_llm_cost_summary(self) -> Dict[str, float]:
         """获取LLM成本汇总"""
-        total_cost = 0.0
-        cost_by_provider = defaultdict(float)
-        cost_by_agent = defaultdict(float)
-
-        for llm_key, metrics in self.performance_metrics.items():
-            total_cost += metrics.total_cost
-
-            # 按供应商统计
-            parts = llm_key.split(':')
-            if len(parts) >= 2:
-                provider = parts[1]
-                cost_by_provider[provider] += metrics.total_cost
-
-            # 按智能体统计
-            agent_type = parts[0]
-            cost_by_agent[agent_type] += metrics.total_cost
-
-        return {
-            'total_cost': total_cost,
-            'cost_by_provider': dict(cost_by_provider),
-            'cost_by_agent': dict(cost_by_agent)
-        }
+        with self._flush_lock:
+            self._flush_locked()
+
+            # 成本在写入指标时已增量汇总，这里只读取快照
+            return {
+                'total_cost': self._total_cost,
+                'cost_by_provider': dict(self._cost_by_provider),
+                'cost_by_agent': dict(self._cost_by_agent)
+            }
 
 
 # 全局LLM工厂实例
@@ -482,6 +911,6 @@ def get_llm_health_report() -> Dict[str, Any]:
     return llm_factory.health_check()
 
 
-def get_agent_llm_mapping() -> Dict[str, Dict[str, Any]]:
+def get_agent_llm_mapping() -> Mapping[str, Mapping[str, Any]]:
     """获取智能体LLM映射"""
     return llm_factory.get_agent_llm_mapping()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+提示缓存边界控制
+在系统提示处标记供应商侧的提示缓存断点，使稳定的前缀（工具定义 + 系统提示）在多轮调用间复用
+"""
+
+from typing import Any, List
+
+# Anthropic提示缓存标记，缓存有效期约5分钟，命中后刷新
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+
+# 需要显式标记缓存断点的供应商；OpenAI对超过1024 tokens的相同前缀自动缓存，无需标记
+EXPLICIT_CACHE_PROVIDERS = frozenset({'anthropic'})
+
+
+def _to_cached_blocks(content: Any) -> List[Any]:
+    """将消息内容转换为内容块列表，并在最后一个块上标记缓存断点"""
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    else:
+        blocks = [dict(block) if isinstance(block, dict) else block for block in content]
+
+    if blocks and isinstance(blocks[-1], dict):
+        blocks[-1]["cache_control"] = dict(ANTHROPIC_CACHE_CONTROL)
+    return blocks
+
+
+def mark_system_prompt_cacheable(messages: Any, provider: str) -> Any:
+    """
+    在最后一条系统消息处设置缓存断点
+
+    断点之前的内容（工具定义、系统提示）由供应商缓存；断点之后的对话历史和工具调用结果每次
+    都会变化，不参与缓存。系统提示中应避免插入时间戳等每次调用都不同的内容，动态内容放在
+    断点之后的用户消息中
+
+    Args:
+        messages: 消息列表或ChatPromptValue
+        provider: LLM供应商
+
+    Returns:
+        标记后的消息列表；不需要显式标记的供应商原样返回
+    """
+    if provider.lower() not in EXPLICIT_CACHE_PROVIDERS:
+        return messages
+
+    if hasattr(messages, 'to_messages'):
+        messages = messages.to_messages()
+
+    messages = list(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        if getattr(message, 'type', None) == 'system':
+            blocks = _to_cached_blocks(message.content)
+            if hasattr(message, 'model_copy'):
+                messages[i] = message.model_copy(update={'content': blocks})
+            else:
+                messages[i] = type(message)(content=blocks)
+            break
+
+    return messages
+
+
+def prompt_cache_runnable(provider: str) -> Any:
+    """
+    创建可插入LangChain链的缓存标记步骤，例如 prompt | prompt_cache_runnable('anthropic') | llm
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    return RunnableLambda(lambda messages: mark_system_prompt_cacheable(messages, provider))
@@ -0,0 +1,597 @@
+"""
+LLM响应缓存
+对确定性请求（temperature为0）按请求内容缓存LLM响应，相同请求直接返回缓存结果
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+# Redis客户端（可选依赖），仅在使用RedisCacheBackend时需要
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# 快速JSON序列化（可选依赖），未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# CachedLLM作为Runnable接入LangChain链；未安装langchain_core时退化为普通代理
+try:
+    from langchain_core.runnables import Runnable, RunnableBinding
+except ImportError:
+    Runnable = object
+    RunnableBinding = None
+
+# 共享缓存后端以纯数据形式保存消息，未安装langchain_core时只缓存JSON类型的结果
+try:
+    from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+except ImportError:
+    BaseMessage = None
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """缓存后端接口"""
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，不存在或已过期时返回None"""
+        ...
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存，ttl为过期秒数，None表示不过期"""
+        ...
+
+    def clear(self):
+        """清空缓存"""
+        ...
+
+
+class MemoryCacheBackend:
+    """进程内LRU缓存后端"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _encode_response(value: Any) -> Optional[bytes]:
+    """
+    将响应编码为纯数据的JSON，供跨进程共享的缓存后端保存
+
+    共享缓存可能被其他进程写入，不使用pickle，读取时不会执行任何代码。
+    只支持LangChain消息和JSON类型的值（如字典形式的结构化输出），其他对象返回None，不写入缓存
+    """
+    if BaseMessage is not None and isinstance(value, BaseMessage):
+        data = {'message': message_to_dict(value)}
+    elif value is None or isinstance(value, (dict, list, str, int, float, bool)):
+        data = {'value': value}
+    else:
+        return None
+
+    try:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode_response(data: bytes) -> Optional[Any]:
+    """还原_encode_response编码的响应，数据无效时返回None"""
+    try:
+        entry = orjson.loads(data) if orjson is not None else json.loads(data)
+        if 'message' in entry:
+            if BaseMessage is None:
+                return None
+            return messages_from_dict([entry['message']])[0]
+        return entry['value']
+    except (TypeError, ValueError, KeyError, IndexError) as e:
+        logger.warning(f"LLM响应缓存数据无效: {str(e)}")
+        return None
+
+
+class FileCacheBackend:
+    """文件缓存后端，每个缓存项保存为一个JSON文件，可跨进程复用"""
+
+    def __init__(self, cache_dir: str = ".cache/llm_responses"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            expires_at, _, data = path.read_bytes().partition(b'\n')
+            expires_at = float(expires_at) if expires_at else None
+        except (OSError, ValueError):
+            return None
+
+        if expires_at is not None and time.time() >= expires_at:
+            path.unlink(missing_ok=True)
+            return None
+        return _decode_response(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        data = _encode_response(value)
+        if data is None:
+            logger.debug(f"{type(value).__name__} 类型的响应无法以纯数据形式保存，不写入文件缓存")
+            return
+
+        # 第一行为过期时间（空行表示不过期），其后为响应数据
+        expires_at = repr(time.time() + ttl).encode() if ttl is not None else b''
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(expires_at + b'\n' + data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f"写入LLM响应缓存失败: {str(e)}")
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+class RedisCacheBackend:
+    """Redis缓存后端，多个进程/节点共享缓存"""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "tradingagents:llm:"):
+        if redis is None:
+            raise ImportError("使用Redis缓存后端需要安装redis: pip install redis")
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self.client.get(self.prefix + key)
+        return _decode_response(data) if data is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        data = _encode_response(value)
+        if data is None:
+            logger.debug(f"{type(value).__name__} 类型的响应无法以纯数据形式保存，不写入Redis缓存")
+            return
+        if ttl is not None:
+            self.client.set(self.prefix + key, data, px=int(ttl * 1000))
+        else:
+            self.client.set(self.prefix + key, data)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryCacheBackend,
+    'file': FileCacheBackend,
+    'redis': RedisCacheBackend,
+}
+
+
+def _str_keys(value: Any) -> Any:
+    """将字典键统一转换为字符串，避免混合类型的键排序时出错"""
+    if isinstance(value, dict):
+        return {str(k): _str_keys(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_str_keys(v) for v in value]
+    return value
+
+
+def _canonical_json(value: Any) -> bytes:
+    """按键排序序列化为JSON字节串，用于计算缓存键"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_str_keys(value), sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _serialize_messages(messages: Any) -> Any:
+    """将LLM输入转换为可JSON序列化的结构，用于计算缓存键"""
+    if isinstance(messages, str):
+        return messages
+    if hasattr(messages, 'to_messages'):
+        # PromptValue
+        messages = messages.to_messages()
+    if isinstance(messages, (list, tuple)):
+        return [_serialize_messages(message) for message in messages]
+    if hasattr(messages, 'content') and hasattr(messages, 'type'):
+        # BaseMessage
+        return {
+            'type': messages.type,
+            'content': messages.content,
+            'tool_calls': getattr(messages, 'tool_calls', None) or None,
+        }
+    return messages
+
+
+class LLMCache:
+    """LLM响应缓存，统计命中率"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: Optional[float] = 3600.0):
+        """
+        初始化LLM响应缓存
+
+        Args:
+            backend: 缓存后端，为None时使用进程内缓存
+            ttl: 缓存过期秒数，None表示不过期
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0}
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: Any, tools: Any = None, **kwargs) -> str:
+        """根据供应商、模型、消息和工具计算请求的缓存键"""
+        payload = {
+            'provider': provider,
+            'model': model,
+            'messages': _serialize_messages(messages),
+            'tools': tools,
+            'kwargs': kwargs,
+        }
+        return hashlib.sha256(_canonical_json(payload)).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存并记录命中情况"""
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"读取LLM响应缓存失败: {str(e)}")
+            value = None
+
+        with self._stats_lock:
+            self.stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """写入缓存"""
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"写入LLM响应缓存失败: {str(e)}")
+
+    def clear(self):
+        """清空缓存和统计"""
+        self.backend.clear()
+        with self._stats_lock:
+            self.stats = {'hits': 0, 'misses': 0}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._stats_lock:
+            hits, misses = self.stats['hits'], self.stats['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total > 0 else 0.0
+        }
+
+
+def _split_last_user_turn(messages: Any) -> Tuple[Any, Optional[str]]:
+    """拆分出最后一条用户消息，返回 (之前的上下文, 用户消息文本)"""
+    messages = _serialize_messages(messages)
+    if isinstance(messages, str):
+        return [], messages
+    if not isinstance(messages, list):
+        return messages, None
+
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        if isinstance(message, dict):
+            role, content = message.get('type') or message.get('role'), message.get('content')
+        elif isinstance(message, list) and len(message) == 2:
+            role, content = message
+        else:
+            continue
+
+        if role in ('human', 'user'):
+            if not isinstance(content, str):
+                content = _canonical_json(content).decode('utf-8')
+            return messages[:i], content
+        break
+
+    return messages, None
+
+
+def _default_embed_fn() -> Callable[[str], Sequence[float]]:
+    """默认使用OpenAI text-embedding-3-small生成向量"""
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model="text-embedding-3-small").embed_query
+
+
+class _VectorIndex:
+    """归一化向量的内积索引，容量满后覆盖最早的条目"""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.responses: List[Any] = [None] * capacity
+        self.size = 0
+        self.head = 0
+
+    def search(self, vector: np.ndarray) -> Tuple[float, Any]:
+        scores = self.vectors[:self.size] @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), self.responses[best]
+
+    def add(self, vector: np.ndarray, response: Any):
+        self.vectors[self.head] = vector
+        self.responses[self.head] = response
+        self.head = (self.head + 1) % len(self.responses)
+        self.size = min(self.size + 1, len(self.responses))
+
+
+class SemanticCache:
+    """
+    语义缓存：按最后一条用户消息的向量相似度复用响应
+
+    在精确缓存未命中时使用，适合措辞不同但含义相同的提示。之前的上下文（系统提示、历史消息）
+    必须完全一致才会比较相似度。结果依赖实时数据的智能体不应启用
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+        threshold: float = 0.92,
+        max_entries: int = 1024
+    ):
+        """
+        初始化语义缓存
+
+        Args:
+            embed_fn: 文本向量化函数，为None时首次使用时创建OpenAI embedding客户端
+            threshold: 余弦相似度阈值，不低于该值视为命中
+            max_entries: 每个命名空间保留的最大条目数
+        """
+        self._embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._indexes: Dict[str, _VectorIndex] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _embed(self, text: str) -> np.ndarray:
+        if self._embed_fn is None:
+            self._embed_fn = _default_embed_fn()
+
+        vector = np.asarray(self._embed_fn(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, namespace: str, text: str) -> Tuple[Optional[Any], np.ndarray]:
+        """查找语义相近的缓存响应，返回 (响应, 查询向量)，未命中时响应为None"""
+        vector = self._embed(text)
+        response = None
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is not None and index.size > 0:
+                score, cached = index.search(vector)
+                if score >= self.threshold:
+                    response = cached
+            self.stats['hits' if response is not None else 'misses'] += 1
+        return response, vector
+
+    def add(self, namespace: str, vector: np.ndarray, response: Any):
+        """保存响应及其查询向量"""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = _VectorIndex(len(vector), self.max_entries)
+            index.add(vector, response)
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._indexes.clear()
+            self.stats = {'hits': 0, 'misses': 0}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            hits, misses = self.stats['hits'], self.stats['misses']
+            entries = sum(index.size for index in self._indexes.values())
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total > 0 else 0.0,
+            'entries': entries
+        }
+
+
+def _schema_id(schema: Any) -> Any:
+    """结构化输出模式的可序列化标识，用于计算缓存键"""
+    if isinstance(schema, dict):
+        return schema
+    if hasattr(schema, 'model_json_schema'):
+        return schema.model_json_schema()
+    return f"{getattr(schema, '__module__', '')}.{getattr(schema, '__qualname__', repr(schema))}"
+
+
+class CachedLLM(Runnable):
+    """
+    LLM实例代理，缓存invoke/ainvoke的结果
+
+    精确缓存只应用于temperature为0的确定性LLM，语义缓存只应用于低温度且允许复用结果的智能体。
+    作为Runnable参与 prompt | llm 组合，以下路径都经过缓存：
+    - invoke/ainvoke，以及基于它们的batch/abatch和stream/astream（命中时一次性返回完整结果）
+    - bind/bind_tools/with_config等返回的RunnableBinding，绑定参数（如tools）计入缓存键
+    - with_structured_output返回的结构化输出链，按输出模式单独缓存解析后的结果（不使用语义缓存）
+    其余属性和方法直接转发给原实例，不经过缓存
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        cache: Optional[LLMCache],
+        provider: str,
+        model: str,
+        semantic_cache: Optional[SemanticCache] = None,
+        namespace: str = "",
+        key_kwargs: Optional[Dict[str, Any]] = None
+    ):
+        self._llm = llm
+        self._cache = cache
+        self._provider = provider
+        self._model = model
+        self._semantic_cache = semantic_cache
+        self._namespace = namespace or f"{provider}:{model}"
+        # 计入缓存键但不传给LLM的参数，用于区分同一模型上包装的不同链（如结构化输出模式）
+        self._key_kwargs = key_kwargs or {}
+
+    @property
+    def wrapped(self) -> Any:
+        """被代理的原始LLM实例"""
+        return self._llm
+
+    def _cache_key(self, input: Any, kwargs: Dict[str, Any]) -> str:
+        tools = kwargs.pop('tools', None)
+        return self._cache.make_key(self._provider, self._model, input, tools, **self._key_kwargs, **kwargs)
+
+    def _semantic_lookup(self, input: Any, kwargs: Dict[str, Any]) -> Tuple[Optional[Any], Optional[tuple]]:
+        """语义缓存查找，返回 (响应, 写回所需的(命名空间, 向量))"""
+        if self._semantic_cache is None or kwargs:
+            # 带工具等额外参数的调用不做语义复用
+            return None, None
+
+        context, text = _split_last_user_turn(input)
+        if not text:
+            return None, None
+
+        context_hash = hashlib.sha256(_canonical_json(context)).hexdigest()
+        namespace = f"{self._namespace}:{context_hash}"
+        try:
+            response, vector = self._semantic_cache.lookup(namespace, text)
+        except Exception as e:
+            logger.warning(f"语义缓存查找失败: {str(e)}")
+            return None, None
+        return response, (namespace, vector)
+
+    def _store(self, key: Optional[str], semantic_entry: Optional[tuple], response: Any):
+        # 缓存保存副本，调用方修改返回的响应不影响之后的命中结果
+        response = copy.deepcopy(response)
+        if key is not None:
+            self._cache.set(key, response)
+        if semantic_entry is not None:
+            namespace, vector = semantic_entry
+            self._semantic_cache.add(namespace, vector, response)
+
+    def invoke(self, input: Any, config: Any = None, **kwargs) -> Any:
+        """调用LLM，相同（或语义相近的）请求命中缓存时直接返回"""
+        key = None
+        if self._cache is not None:
+            key = self._cache_key(input, dict(kwargs))
+            response = self._cache.get(key)
+            if response is not None:
+                return copy.deepcopy(response)
+
+        response, semantic_entry = self._semantic_lookup(input, kwargs)
+        if response is not None:
+            if key is not None:
+                self._cache.set(key, response)
+            return copy.deepcopy(response)
+
+        response = self._llm.invoke(input, config, **kwargs)
+        self._store(key, semantic_entry, response)
+        return response
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs) -> Any:
+        """异步调用LLM，相同（或语义相近的）请求命中缓存时直接返回"""
+        key = None
+        if self._cache is not None:
+            key = self._cache_key(input, dict(kwargs))
+            response = self._cache.get(key)
+            if response is not None:
+                return copy.deepcopy(response)
+
+        semantic_entry = None
+        if self._semantic_cache is not None:
+            # 向量化是阻塞的网络调用，放到线程池执行
+            response, semantic_entry = await asyncio.to_thread(self._semantic_lookup, input, kwargs)
+            if response is not None:
+                if key is not None:
+                    self._cache.set(key, response)
+                return copy.deepcopy(response)
+
+        response = await self._llm.ainvoke(input, config, **kwargs)
+        self._store(key, semantic_entry, response)
+        return response
+
+    def __call__(self, input: Any, **kwargs) -> Any:
+        return self.invoke(input, **kwargs)
+
+    def bind_tools(self, tools: Any, **kwargs) -> Any:
+        """绑定工具，由原实例把工具转换为请求参数，再绑定到缓存代理上"""
+        binding = self._llm.bind_tools(tools, **kwargs)
+        if RunnableBinding is None or not isinstance(binding, RunnableBinding) or binding.bound is not self._llm:
+            logger.warning(f"{self._namespace} 的bind_tools结果无法接入响应缓存，工具调用不做缓存")
+            return binding
+        return self.bind(**binding.kwargs).with_config(binding.config)
+
+    def with_structured_output(self, schema: Any, **kwargs) -> Any:
+        """结构化输出链整体包装为缓存代理，缓存键包含输出模式和参数"""
+        return CachedLLM(
+            self._llm.with_structured_output(schema, **kwargs),
+            self._cache,
+            self._provider,
+            self._model,
+            namespace=self._namespace,
+            key_kwargs={**self._key_kwargs, 'structured_output': _schema_id(schema), 'structured_kwargs': kwargs}
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name == '_llm' or name.startswith('__'):
+            # 反序列化/复制时实例尚未初始化；__getstate__等协议方法不能转发给原实例
+            raise AttributeError(name)
+        return getattr(self._llm, name)
+
+    def __repr__(self) -> str:
+        return f"CachedLLM({self._llm!r})"
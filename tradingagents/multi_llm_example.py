@@ -6,24 +6,23 @@
 
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any
 
-# 导入多LLM系统
-from tradingagents.llm.llm_factory import (
-    LLMFactory, get_llm_for_agent, record_llm_usage,
-    get_llm_performance_report, get_llm_health_report, get_agent_llm_mapping
-)
+from tradingagents.example_utils import batched_output
 
-# 导入配置管理器
-from tradingagents.config.config_manager import get_config, update_config
+# LLM工厂和配置管理器在各演示函数内按需导入，只运行部分演示时不加载无关模块
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@batched_output
 def demonstrate_llm_factory():
     """演示LLM工厂功能"""
+    from tradingagents.llm.llm_factory import LLMFactory, get_agent_llm_mapping
+
     print("=" * 60)
     print("🏭 多智能体LLM工厂演示")
     print("=" * 60)
@@ -47,8 +46,11 @@ def demonstrate_llm_factory():
     return llm_factory
 
 
+@batched_output
 def demonstrate_agent_llm_usage():
     """演示智能体LLM使用"""
+    from tradingagents.llm.llm_factory import get_llm_for_agent, get_agent_llm_mapping
+
     print("\n" + "=" * 60)
     print("🤖 智能体个性化LLM演示")
     print("=" * 60)
@@ -63,12 +65,25 @@ def demonstrate_agent_llm_usage():
 
     print("🔧 为不同智能体获取个性化LLM:")
 
+    # 获取LLM配置信息
+    mapping = get_agent_llm_mapping()
+
+    # 并发创建LLM实例，单个智能体失败不影响其他智能体
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(agent_types)) as executor:
+        futures = {executor.submit(get_llm_for_agent, agent_type): agent_type for agent_type in agent_types}
+        for future in as_completed(futures):
+            agent_type = futures[future]
+            try:
+                results[agent_type] = future.result()
+            except Exception as e:
+                results[agent_type] = e
+
     for agent_type in agent_types:
         try:
-            llm = get_llm_for_agent(agent_type)
-
-            # 获取LLM配置信息
-            mapping = get_agent_llm_mapping()
+            llm = results[agent_type]
+            if isinstance(llm, Exception):
+                raise llm
             config = mapping[agent_type]
 
             print(f"   ✅ {agent_type}:")
@@ -83,8 +98,11 @@ def demonstrate_agent_llm_usage():
     return True
 
 
+@batched_output
 def demonstrate_performance_monitoring():
     """演示性能监控功能"""
+    from tradingagents.llm.llm_factory import record_llm_usage, get_llm_performance_report
+
     print("\n" + "=" * 60)
     print("📊 LLM性能监控演示")
     print("=" * 60)
@@ -120,8 +138,11 @@ def demonstrate_performance_monitoring():
         print(f"     成本: ${stats['total_cost']:.3f}")
 
 
+@batched_output
 def demonstrate_health_monitoring():
     """演示健康监控功能"""
+    from tradingagents.llm.llm_factory import get_llm_health_report
+
     print("\n" + "=" * 60)
     print("❤️ LLM健康监控演示")
     print("=" * 60)
@@ -132,23 +153,26 @@ def demonstrate_health_monitoring():
     print("🏥 系统健康状态:")
     print(f"   - 整体状态: {health_report['overall_health']}")
 
-    print("
-✅ 健康智能体:"    for agent in health_report['healthy_agents']:
+    print("\n✅ 健康智能体:")
+    for agent in health_report['healthy_agents']:
         print(f"   - {agent}")
 
     if health_report['unhealthy_agents']:
-        print("
-⚠️  不健康智能体:"        for item in health_report['unhealthy_agents']:
+        print("\n⚠️  不健康智能体:")
+        for item in health_report['unhealthy_agents']:
             print(f"   - {item['agent']}: 健康评分 {item['health_score']:.2f}")
 
     if health_report['circuit_breaker_trips']:
-        print("
-🔥 熔断器触发:"        for item in health_report['circuit_breaker_trips']:
+        print("\n🔥 熔断器触发:")
+        for item in health_report['circuit_breaker_trips']:
             print(f"   - {item['agent']}: 失败 {item['failure_count']} 次")
 
 
+@batched_output
 def demonstrate_llm_cost_analysis():
     """演示LLM成本分析"""
+    from tradingagents.llm.llm_factory import LLMFactory
+
     print("\n" + "=" * 60)
     print("💰 LLM成本分析演示")
     print("=" * 60)
@@ -163,21 +187,24 @@ def demonstrate_llm_cost_analysis():
 
     # 显示成本汇总
     cost_summary = llm_factory.get_llm_cost_summary()
-    print("
-📊 成本汇总:"    print(f"   - 总成本: ${cost_summary['total_cost']:.3f}")
+    print("\n📊 成本汇总:")
+    print(f"   - 总成本: ${cost_summary['total_cost']:.3f}")
     print(f"   - 总token数: {cost_summary['total_cost']:,}")
 
-    print("
-📈 按供应商成本:"    for provider, cost in cost_summary['cost_by_provider'].items():
+    print("\n📈 按供应商成本:")
+    for provider, cost in cost_summary['cost_by_provider'].items():
         print(f"   - {provider}: ${cost:.3f}")
 
-    print("
-👥 按智能体成本:"    for agent, cost in cost_summary['cost_by_agent'].items():
+    print("\n👥 按智能体成本:")
+    for agent, cost in cost_summary['cost_by_agent'].items():
         print(f"   - {agent}: ${cost:.3f}")
 
 
+@batched_output
 def demonstrate_config_based_llm():
     """演示基于配置的LLM管理"""
+    from tradingagents.config.config_manager import get_config
+
     print("\n" + "=" * 60)
     print("⚙️ 基于配置的LLM管理演示")
     print("=" * 60)
@@ -199,8 +226,8 @@ def demonstrate_config_based_llm():
     print(f"     最大token: {analyst_config.max_tokens}")
 
     # 演示配置更新
-    print("
-🔄 配置更新演示:"    print("   - 更新研究员使用Claude-3...")
+    print("\n🔄 配置更新演示:")
+    print("   - 更新研究员使用Claude-3...")
 
     # 更新配置示例
     new_llm_config = {
@@ -217,6 +244,7 @@ def demonstrate_config_based_llm():
     print("   - 新配置已准备，实际部署时会调用 update_config()")
 
 
+@batched_output
 def demonstrate_llm_comparison():
     """演示不同LLM供应商对比"""
     print("\n" + "=" * 60)
@@ -226,27 +254,28 @@ def demonstrate_llm_comparison():
     print("🏆 供应商推荐配置:")
 
     # 成本效益分析
-    print("
-💡 成本效益推荐:"    print("   - 高质量分析: gpt-4o (平衡成本和质量)")
+    print("\n💡 成本效益推荐:")
+    print("   - 高质量分析: gpt-4o (平衡成本和质量)")
     print("   - 深度思考: o1-preview (高质量研究)")
     print("   - 快速响应: gpt-4o-mini (成本最优)")
     print("   - 保守决策: gpt-4o (稳定可靠)")
 
     # 智能体最优配置建议
-    print("
-🎯 智能体最优配置:"    print("   - 研究员: o1-preview (深度思考)")
+    print("\n🎯 智能体最优配置:")
+    print("   - 研究员: o1-preview (深度思考)")
     print("   - 分析师: gpt-4o (快速准确)")
     print("   - 交易员: gpt-4o (平衡决策)")
     print("   - 风险管理: gpt-4o (保守稳定)")
 
     # 成本对比
-    print("
-💰 成本对比 (估算):"    print("   - gpt-4o: $0.03/1K tokens")
+    print("\n💰 成本对比 (估算):")
+    print("   - gpt-4o: $0.03/1K tokens")
     print("   - gpt-4o-mini: $0.0015/1K tokens")
     print("   - o1-preview: $0.15/1K tokens")
     print("   - Claude-3-5-Sonnet: $0.03/1K tokens")
 
 
+@batched_output
 def demonstrate_error_handling():
     """演示错误处理机制"""
     print("\n" + "=" * 60)
@@ -261,14 +290,14 @@ def demonstrate_error_handling():
     print("   ✅ 成本控制: 防止意外的大额支出")
 
     # 演示熔断器逻辑
-    print("
-🔥 熔断器示例:"    print("   - 连续失败5次 → 触发熔断")
+    print("\n🔥 熔断器示例:")
+    print("   - 连续失败5次 → 触发熔断")
     print("   - 熔断期间60秒 → 使用备用配置")
     print("   - 自动恢复 → 故障排除后恢复正常")
 
     # 演示成本控制
-    print("
-💰 成本控制示例:"    print("   - 单次请求成本估算")
+    print("\n💰 成本控制示例:")
+    print("   - 单次请求成本估算")
     print("   - 每日成本限制")
     print("   - 异常成本预警")
 
@@ -3,19 +3,51 @@
 用于发送交易提醒、风险预警、日报表等通知
 """
 
+import asyncio
+import atexit
+import base64
+import functools
+import io
+import json
 import logging
 import smtplib
+import ssl
+import threading
+import time
+import mimetypes
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from email import encoders, policy
+from email.generator import BytesGenerator
 from email.header import Header
 from email.utils import formataddr
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+import jinja2
+from markupsafe import escape
+
+# 异步SMTP客户端（可选依赖），未安装时异步接口退化为线程池中的同步发送
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
+
+# 快速JSON序列化（可选依赖），未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# HTTP客户端（可选依赖），仅在使用HTTP邮件API时需要
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # 导入配置管理器
 from ..config.config_manager import get_config
 
@@ -33,6 +65,12 @@ class EmailConfig:
     email_password: str = ""
     use_tls: bool = True
     sender_name: str = "TradingAgents"
+    transport: str = "smtp"  # 发送方式: smtp 或 sendgrid
+    api_key: str = ""  # HTTP邮件API密钥
+
+
+# SendGrid邮件发送接口
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
 
 
 class EmailTemplate:
@@ -92,8 +130,8 @@ class EmailTemplate:
             <h4>💰 账户概览</h4>
             <p><strong>期初价值：</strong>¥{initial_value:,.2f}</p>
             <p><strong>期末价值：</strong>¥{current_value:,.2f}</p>
-            <p><strong>当日盈亏：</strong><span style="color: {'green' if daily_pnl >= 0 else 'red'};">{'+' if daily_pnl >= 0 else ''}¥{daily_pnl:,.2f}</span></p>
-            <p><strong>盈亏比例：</strong><span style="color: {'green' if daily_pnl >= 0 else 'red'};">{'+' if daily_pnl >= 0 else ''}{daily_pnl_ratio:.2%}</span></p>
+            <p><strong>当日盈亏：</strong><span style="color: {pnl_color};">{pnl_sign}¥{daily_pnl:,.2f}</span></p>
+            <p><strong>盈亏比例：</strong><span style="color: {pnl_ratio_color};">{pnl_ratio_sign}{daily_pnl_ratio:.2%}</span></p>
         </div>
 
         <div style="background-color: #fff3e0; padding: 15px; border-radius: 5px; margin: 10px 0;">
@@ -111,7 +149,7 @@ class EmailTemplate:
     </html>
     """
 
-    # 持仓详情模板
+    # 持仓详情模板（Jinja2，行循环在模板内完成）
     POSITIONS_DETAIL = """
         <div style="background-color: #f3e6f3; padding: 15px; border-radius: 5px; margin: 10px 0;">
             <h4>📊 持仓详情</h4>
@@ -127,25 +165,281 @@ class EmailTemplate:
                     </tr>
                 </thead>
                 <tbody>
-                    {position_rows}
+                {%- for pos in positions %}
+                    {%- set pnl = pos.get('unrealized_pnl', 0) %}
+                    <tr>
+                        <td style="padding: 8px; border: 1px solid #ddd;">{{ pos.get('symbol', '') }}</td>
+                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">{{ pos.get('quantity', 0) }}</td>
+                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">¥{{ '{:.2f}'.format(pos.get('average_price', 0)) }}</td>
+                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">¥{{ '{:.2f}'.format(pos.get('current_price', 0)) }}</td>
+                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">¥{{ '{:,.2f}'.format(pos.get('market_value', 0)) }}</td>
+                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd; color: {{ 'green' if pnl >= 0 else 'red' }};">
+                            {{ '+' if pnl >= 0 else '' }}¥{{ '{:,.2f}'.format(pnl) }}
+                        </td>
+                    </tr>
+                {%- endfor %}
                 </tbody>
             </table>
         </div>
     """
 
-    # 持仓行模板
-    POSITION_ROW = """
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd;">{symbol}</td>
-                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">{quantity}</td>
-                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">¥{average_price:.2f}</td>
-                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">¥{current_price:.2f}</td>
-                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd;">¥{market_value:,.2f}</td>
-                        <td style="padding: 8px; text-align: right; border: 1px solid #ddd; color: {'green' if unrealized_pnl >= 0 else 'red'};">
-                            {'+' if unrealized_pnl >= 0 else ''}¥{unrealized_pnl:,.2f}
-                        </td>
-                    </tr>
+
+# 模板在导入时绑定format_map，渲染时直接调用，避免重复的属性查找和关键字参数打包
+_TRADE_ALERT_FORMAT = EmailTemplate.TRADE_ALERT.format_map
+_RISK_ALERT_FORMAT = EmailTemplate.RISK_ALERT.format_map
+_DAILY_REPORT_FORMAT = EmailTemplate.DAILY_REPORT.format_map
+
+# 持仓表格在导入时编译为Jinja2模板，自动转义股票代码等字段
+_POSITIONS_DETAIL_TEMPLATE = jinja2.Environment(autoescape=True).from_string(EmailTemplate.POSITIONS_DETAIL)
+
+
+@functools.lru_cache(maxsize=64)
+def _encoded_attachment(file_path: str, mtime_ns: int, size: int) -> MIMEBase:
+    """读取并base64编码附件，按文件修改时间和大小缓存，同一文件多次发送只编码一次"""
+    with open(file_path, 'rb') as attachment:
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(attachment.read())
+    encoders.encode_base64(part)
+    part.add_header(
+        'Content-Disposition',
+        f"attachment; filename= {os.path.basename(file_path)}"
+    )
+    return part
+
+
+# 邮件使用compat32的Header对象构建，序列化时沿用compat32规则，仅将换行符改为SMTP要求的CRLF
+_SMTP_POLICY = policy.compat32.clone(linesep='\r\n')
+
+
+def _flatten_message(msg: MIMEMultipart) -> bytes:
+    """将邮件序列化为SMTP传输所需的字节串"""
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, policy=_SMTP_POLICY).flatten(msg)
+    return buffer.getvalue()
+
+
+def _format_details(details: Dict[str, Any]) -> str:
+    """将通知详情格式化为缩进的JSON文本"""
+    if orjson is not None:
+        return orjson.dumps(
+            details, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        ).decode('utf-8')
+    return json.dumps(details, indent=2, ensure_ascii=False, default=str)
+
+
+# 最近一次格式化的时间戳: (秒级时间, 格式化字符串)，同一秒内的通知复用
+_last_tick: Tuple[int, str] = (0, '')
+
+
+def _now_str() -> str:
+    """当前时间的格式化字符串，按秒缓存"""
+    global _last_tick
+    t = int(time.time())
+    tick = _last_tick
+    if tick[0] != t:
+        tick = _last_tick = (t, datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S'))
+    return tick[1]
+
+
+def _dumps_json(value: Any) -> bytes:
+    """序列化HTTP请求体"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+class HttpEmailBackend:
     """
+    HTTP邮件API发送后端（SendGrid）
+
+    每封邮件只需一次HTTPS请求，发送共用保持长连接的aiohttp会话，
+    避免SMTP的HELO/AUTH/MAIL/RCPT/DATA多次往返；同步发送在后台事件循环中执行，同样复用长连接
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        sender_email: str,
+        sender_name: str = "TradingAgents",
+        endpoint: str = SENDGRID_SEND_URL,
+        max_connections: int = 32,
+        keepalive_timeout: float = 60
+    ):
+        if aiohttp is None:
+            raise ImportError("使用HTTP邮件API需要安装aiohttp")
+
+        self.api_key = api_key
+        self.sender_email = sender_email
+        self.sender_name = sender_name
+        self.endpoint = endpoint
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        # 会话只能在创建它的事件循环中使用: 事件循环 -> 会话
+        self._sessions: Dict[asyncio.AbstractEventLoop, "aiohttp.ClientSession"] = {}
+        # 同步发送使用的后台事件循环，首次同步发送时启动
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_loop_lock = threading.Lock()
+
+    def _new_session(self) -> "aiohttp.ClientSession":
+        """创建带连接池的HTTP会话"""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=self.keepalive_timeout),
+            headers={
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            }
+        )
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """获取当前事件循环的共享会话，首次使用时创建"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            # 已结束的事件循环遗留的会话无法再关闭，只移除引用
+            for stale_loop in [l for l in self._sessions if l.is_closed()]:
+                del self._sessions[stale_loop]
+            session = self._sessions[loop] = self._new_session()
+        return session
+
+    def _build_payload(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str,
+        content_type: str = "html",
+        attachments: List[str] = None
+    ) -> Dict[str, Any]:
+        """创建SendGrid请求体"""
+        payload = {
+            'personalizations': [{'to': [{'email': email} for email in to_emails]}],
+            'from': {'email': self.sender_email, 'name': self.sender_name},
+            'subject': subject,
+            'content': [{
+                'type': 'text/html' if content_type == "html" else 'text/plain',
+                'value': content
+            }]
+        }
+
+        if attachments:
+            payload['attachments'] = []
+            for file_path in attachments:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                payload['attachments'].append({
+                    'content': base64.b64encode(data).decode('ascii'),
+                    'filename': os.path.basename(file_path),
+                    'type': mimetypes.guess_type(file_path)[0] or 'application/octet-stream',
+                    'disposition': 'attachment'
+                })
+
+        return payload
+
+    async def _post(self, session: "aiohttp.ClientSession", subject: str, to_emails: List[str], body: bytes) -> bool:
+        """发送请求，SendGrid成功时返回202"""
+        try:
+            async with session.post(self.endpoint, data=body) as response:
+                if response.status >= 400:
+                    logger.error(f"邮件发送失败: HTTP {response.status} {await response.text()}")
+                    return False
+
+            logger.info(f"邮件发送成功: {subject} -> {to_emails}")
+            return True
+
+        except Exception as e:
+            logger.error(f"邮件发送失败: {str(e)}")
+            return False
+
+    async def send_email_async(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str,
+        content_type: str = "html",
+        attachments: List[str] = None
+    ) -> bool:
+        """异步发送邮件，复用共享会话的长连接"""
+        try:
+            body = _dumps_json(self._build_payload(to_emails, subject, content, content_type, attachments))
+        except Exception as e:
+            logger.error(f"邮件发送失败: {str(e)}")
+            return False
+
+        return await self._post(self._get_session(), subject, to_emails, body)
+
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """获取同步发送使用的后台事件循环，首次调用时在守护线程中启动，未调用close()时在进程退出时停止"""
+        with self._sync_loop_lock:
+            if self._sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._run_sync_loop, args=(loop,), name="email-http-sender", daemon=True
+                ).start()
+                self._sync_loop = loop
+                atexit.register(self._stop_sync_loop)
+            return self._sync_loop
+
+    def _stop_sync_loop(self):
+        """关闭后台事件循环中的会话并停止该循环"""
+        atexit.unregister(self._stop_sync_loop)
+        with self._sync_loop_lock:
+            loop, self._sync_loop = self._sync_loop, None
+        if loop is None:
+            return
+
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            try:
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"关闭邮件HTTP会话失败: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    @staticmethod
+    def _run_sync_loop(loop: asyncio.AbstractEventLoop):
+        """后台线程主函数，事件循环停止后关闭"""
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def send_email(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str,
+        content_type: str = "html",
+        attachments: List[str] = None
+    ) -> bool:
+        """同步发送邮件，在后台事件循环中执行，多次调用共用同一个连接池"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            logger.warning("在运行中的事件循环内同步发送邮件会阻塞该循环，请改用send_email_async")
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.send_email_async(to_emails, subject, content, content_type, attachments),
+            self._get_sync_loop()
+        )
+        return future.result()
+
+    async def close(self):
+        """关闭全部共享会话，并停止同步发送使用的后台事件循环"""
+        current_loop = asyncio.get_running_loop()
+        sessions, self._sessions = self._sessions, {}
+        for loop, session in sessions.items():
+            if session.closed:
+                continue
+            if loop is current_loop:
+                await session.close()
+            elif loop.is_running():
+                # 会话属于其他线程中的事件循环，需在该循环中关闭
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+
+        # 后台事件循环的会话已在上面关闭，这里只停止循环
+        self._stop_sync_loop()
 
 
 class EmailService:
@@ -162,18 +456,33 @@ class EmailService:
             # 从系统配置读取邮件配置
             system_config = get_config()
             email_config_dict = {
-                'enabled': system_config.email_notification.enabled,
                 'smtp_server': system_config.email_notification.smtp_server,
                 'smtp_port': system_config.email_notification.smtp_port,
                 'email_user': system_config.email_notification.email_user,
                 'email_password': system_config.email_notification.email_password,
                 'use_tls': system_config.email_notification.use_tls,
-                'sender_name': system_config.email_notification.sender_name
+                'sender_name': system_config.email_notification.sender_name,
+                'transport': system_config.email_notification.transport,
+                'api_key': system_config.email_notification.api_key
             }
             config = EmailConfig(**email_config_dict)
 
         self.config = config
-        self.smtp_server = None
+        self.smtp_server: Optional[smtplib.SMTP] = None  # 复用的SMTP连接
+        self._smtp_lock = threading.Lock()
+        # TLS上下文只创建一次，避免每次连接重新加载系统证书
+        self._ssl_context = ssl.create_default_context()
+        # HTTP邮件API后端，transport为smtp或未安装aiohttp时为None，使用SMTP发送
+        self.http_backend = self._create_http_backend()
+
+    def _create_http_backend(self) -> Optional[HttpEmailBackend]:
+        """按配置创建HTTP邮件API后端"""
+        if self.config.transport != 'sendgrid':
+            return None
+        if aiohttp is None:
+            logger.warning("未安装aiohttp，邮件改用SMTP发送")
+            return None
+        return HttpEmailBackend(self.config.api_key, self.config.email_user, self.config.sender_name)
 
     def send_email(
         self,
@@ -196,23 +505,11 @@ class EmailService:
         Returns:
             是否发送成功
         """
+        if self.http_backend is not None:
+            return self.http_backend.send_email(to_emails, subject, content, content_type, attachments)
+
         try:
-            # 创建邮件消息
-            msg = MIMEMultipart()
-            msg['From'] = formataddr((str(Header(self.config.sender_name, 'utf-8')), self.config.email_user))
-            msg['To'] = ', '.join(to_emails)
-            msg['Subject'] = Header(subject, 'utf-8')
-
-            # 添加邮件内容
-            if content_type == "html":
-                msg.attach(MIMEText(content, 'html', 'utf-8'))
-            else:
-                msg.attach(MIMEText(content, 'plain', 'utf-8'))
-
-            # 添加附件
-            if attachments:
-                for attachment_path in attachments:
-                    self._add_attachment(msg, attachment_path)
+            msg = self._build_message(to_emails, subject, content, content_type, attachments)
 
             # 发送邮件
             self._send_smtp_email(msg, to_emails)
@@ -224,34 +521,209 @@ class EmailService:
             logger.error(f"邮件发送失败: {str(e)}")
             return False
 
-    def _send_smtp_email(self, msg: MIMEMultipart, to_emails: List[str]):
-        """通过SMTP发送邮件"""
+    async def send_emails_async(
+        self,
+        to_emails: List[str],
+        emails: List[Tuple[str, str]],
+        content_type: str = "html"
+    ) -> List[bool]:
+        """
+        异步批量发送邮件，所有邮件共用一个已登录的SMTP会话（HTTP邮件API时共用连接池）
+
+        Args:
+            to_emails: 收件人邮箱列表
+            emails: (邮件主题, 邮件内容) 列表
+            content_type: 内容类型 ('html' or 'plain')
+
+        Returns:
+            每封邮件是否发送成功
+        """
+        if not emails:
+            return []
+
+        if self.http_backend is not None:
+            return list(await asyncio.gather(*[
+                self.http_backend.send_email_async(to_emails, subject, content, content_type)
+                for subject, content in emails
+            ]))
+
+        if aiosmtplib is None:
+            # 未安装aiosmtplib时在线程池中复用同步连接发送
+            return list(await asyncio.gather(*[
+                asyncio.to_thread(self.send_email, to_emails, subject, content, content_type)
+                for subject, content in emails
+            ]))
+
         try:
-            server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
+            implicit_tls = self.config.smtp_port == smtplib.SMTP_SSL_PORT
+            async with aiosmtplib.SMTP(
+                hostname=self.config.smtp_server,
+                port=self.config.smtp_port,
+                use_tls=implicit_tls,
+                start_tls=self.config.use_tls and not implicit_tls,
+                tls_context=self._ssl_context
+            ) as smtp:
+                await smtp.login(self.config.email_user, self.config.email_password)
+                results = await asyncio.gather(*[
+                    self.send_email_async(to_emails, subject, content, content_type, smtp=smtp)
+                    for subject, content in emails
+                ])
+        except Exception as e:
+            logger.error(f"SMTP连接失败: {str(e)}")
+            return [False] * len(emails)
 
-            if self.config.use_tls:
-                server.starttls()
+        return list(results)
 
-            server.login(self.config.email_user, self.config.email_password)
-            server.sendmail(self.config.email_user, to_emails, msg.as_string())
-            server.quit()
+    async def send_email_async(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str,
+        content_type: str = "html",
+        attachments: List[str] = None,
+        smtp: Any = None
+    ) -> bool:
+        """
+        异步发送邮件
+
+        Args:
+            to_emails: 收件人邮箱列表
+            subject: 邮件主题
+            content: 邮件内容
+            content_type: 内容类型 ('html' or 'plain')
+            attachments: 附件文件路径列表
+            smtp: 已登录的aiosmtplib.SMTP会话，为None时单独建立连接
+
+        Returns:
+            是否发送成功
+        """
+        if smtp is None:
+            if self.http_backend is not None:
+                return await self.http_backend.send_email_async(to_emails, subject, content, content_type, attachments)
+            if aiosmtplib is None or attachments:
+                return await asyncio.to_thread(
+                    self.send_email, to_emails, subject, content, content_type, attachments
+                )
+            results = await self.send_emails_async(to_emails, [(subject, content)], content_type)
+            return results[0]
+
+        try:
+            msg = self._build_message(to_emails, subject, content, content_type, attachments)
+            await smtp.sendmail(self.config.email_user, to_emails, _flatten_message(msg))
+
+            logger.info(f"邮件发送成功: {subject} -> {to_emails}")
+            return True
+
+        except Exception as e:
+            logger.error(f"邮件发送失败: {str(e)}")
+            return False
+
+    def _build_message(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str,
+        content_type: str = "html",
+        attachments: List[str] = None
+    ) -> MIMEMultipart:
+        """创建邮件消息"""
+        msg = MIMEMultipart()
+        msg['From'] = formataddr((str(Header(self.config.sender_name, 'utf-8')), self.config.email_user))
+        msg['To'] = ', '.join(to_emails)
+        msg['Subject'] = Header(subject, 'utf-8')
+
+        # 添加邮件内容
+        if content_type == "html":
+            msg.attach(MIMEText(content, 'html', 'utf-8'))
+        else:
+            msg.attach(MIMEText(content, 'plain', 'utf-8'))
+
+        # 添加附件
+        if attachments:
+            for attachment_path in attachments:
+                self._add_attachment(msg, attachment_path)
+
+        return msg
+
+    def _send_smtp_email(self, msg: MIMEMultipart, to_emails: List[str]):
+        """通过SMTP发送邮件（复用已登录的连接）"""
+        try:
+            data = _flatten_message(msg)
+            with self._smtp_lock:
+                server = self._ensure_connection()
+                try:
+                    server.sendmail(self.config.email_user, to_emails, data)
+                except smtplib.SMTPServerDisconnected:
+                    # 连接在检查后被服务器关闭，重连后重试一次
+                    self._drop_connection()
+                    server = self._ensure_connection()
+                    server.sendmail(self.config.email_user, to_emails, data)
 
         except Exception as e:
             logger.error(f"SMTP发送失败: {str(e)}")
             raise
 
+    def _ensure_connection(self) -> smtplib.SMTP:
+        """获取可用的SMTP连接，连接失效时重新建立（调用方需持有_smtp_lock）"""
+        if self.smtp_server is not None:
+            try:
+                self.smtp_server.noop()
+                return self.smtp_server
+            except (smtplib.SMTPException, OSError):
+                logger.info("SMTP连接已失效，重新连接")
+                self._drop_connection()
+
+        self.smtp_server = self._open_connection()
+        return self.smtp_server
+
+    def _open_connection(self) -> smtplib.SMTP:
+        """建立并登录SMTP连接，465端口使用SMTP over SSL，其余端口按配置使用STARTTLS"""
+        if self.config.smtp_port == smtplib.SMTP_SSL_PORT:
+            server = smtplib.SMTP_SSL(self.config.smtp_server, self.config.smtp_port, context=self._ssl_context)
+        else:
+            server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
+
+        try:
+            if self.config.use_tls and not isinstance(server, smtplib.SMTP_SSL):
+                server.starttls(context=self._ssl_context)
+
+            server.login(self.config.email_user, self.config.email_password)
+        except Exception:
+            server.close()
+            raise
+
+        return server
+
+    def _drop_connection(self):
+        """丢弃当前SMTP连接"""
+        server, self.smtp_server = self.smtp_server, None
+        if server is not None:
+            try:
+                server.close()
+            except OSError:
+                pass
+
+    async def aclose(self):
+        """关闭HTTP会话和复用的SMTP连接"""
+        if self.http_backend is not None:
+            await self.http_backend.close()
+        self.close()
+
+    def close(self):
+        """关闭复用的SMTP连接"""
+        with self._smtp_lock:
+            server, self.smtp_server = self.smtp_server, None
+            if server is not None:
+                try:
+                    server.quit()
+                except (smtplib.SMTPException, OSError):
+                    server.close()
+
     def _add_attachment(self, msg: MIMEMultipart, file_path: str):
         """添加附件"""
         try:
-            with open(file_path, 'rb') as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f"attachment; filename= {os.path.basename(file_path)}"
-                )
-                msg.attach(part)
+            stat = os.stat(file_path)
+            msg.attach(_encoded_attachment(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size))
 
         except Exception as e:
             logger.error(f"添加附件失败 {file_path}: {str(e)}")
@@ -268,18 +740,32 @@ class EmailService:
         timestamp: str
     ) -> bool:
         """发送交易提醒邮件"""
+        subject, content = self.render_trade_alert(symbol, trade_type, quantity, price, confidence, timestamp)
+        return self.send_email(to_emails, subject, content)
+
+    def render_trade_alert(
+        self,
+        symbol: str,
+        trade_type: str,
+        quantity: int,
+        price: float,
+        confidence: float,
+        timestamp: str
+    ) -> Tuple[str, str]:
+        """生成交易提醒邮件的主题和内容"""
         subject = f"交易提醒 - {symbol} {trade_type}"
 
-        content = EmailTemplate.TRADE_ALERT.format(
-            symbol=symbol,
-            trade_type=trade_type,
-            quantity=quantity,
-            price=price,
-            confidence=confidence,
-            timestamp=timestamp
-        )
+        # 字符串字段转义后再插入HTML，数值字段直接格式化
+        content = _TRADE_ALERT_FORMAT({
+            'symbol': escape(symbol),
+            'trade_type': escape(trade_type),
+            'quantity': quantity,
+            'price': price,
+            'confidence': confidence,
+            'timestamp': escape(timestamp)
+        })
 
-        return self.send_email(to_emails, subject, content)
+        return subject, content
 
     def send_risk_alert(
         self,
@@ -292,18 +778,31 @@ class EmailService:
         timestamp: str
     ) -> bool:
         """发送风险预警邮件"""
+        subject, content = self.render_risk_alert(alert_type, symbol, severity, message, suggested_action, timestamp)
+        return self.send_email(to_emails, subject, content)
+
+    def render_risk_alert(
+        self,
+        alert_type: str,
+        symbol: str,
+        severity: str,
+        message: str,
+        suggested_action: str,
+        timestamp: str
+    ) -> Tuple[str, str]:
+        """生成风险预警邮件的主题和内容"""
         subject = f"风险预警 - {alert_type} ({severity})"
 
-        content = EmailTemplate.RISK_ALERT.format(
-            alert_type=alert_type,
-            symbol=symbol,
-            severity=severity,
-            message=message,
-            suggested_action=suggested_action,
-            timestamp=timestamp
-        )
+        content = _RISK_ALERT_FORMAT({
+            'alert_type': escape(alert_type),
+            'symbol': escape(symbol),
+            'severity': escape(severity),
+            'message': escape(message),
+            'suggested_action': escape(suggested_action),
+            'timestamp': escape(timestamp)
+        })
 
-        return self.send_email(to_emails, subject, content)
+        return subject, content
 
     def send_daily_report(
         self,
@@ -311,39 +810,39 @@ class EmailService:
         report_data: Dict[str, Any]
     ) -> bool:
         """发送每日报告邮件"""
+        subject, content = self.render_daily_report(report_data)
+        return self.send_email(to_emails, subject, content)
+
+    def render_daily_report(self, report_data: Dict[str, Any]) -> Tuple[str, str]:
+        """生成每日报告邮件的主题和内容"""
         subject = f"每日交易报告 - {report_data.get('date', '今日')}"
 
         # 生成持仓详情HTML
         positions_html = ""
         if report_data.get('top_positions'):
-            position_rows = []
-            for pos in report_data['top_positions']:
-                position_rows.append(EmailTemplate.POSITION_ROW.format(
-                    symbol=pos.get('symbol', ''),
-                    quantity=pos.get('quantity', 0),
-                    average_price=pos.get('average_price', 0),
-                    current_price=pos.get('current_price', 0),
-                    market_value=pos.get('market_value', 0),
-                    unrealized_pnl=pos.get('unrealized_pnl', 0)
-                ))
-
-            positions_html = EmailTemplate.POSITIONS_DETAIL.format(
-                position_rows=''.join(position_rows)
-            )
-
-        content = EmailTemplate.DAILY_REPORT.format(
-            initial_value=report_data.get('initial_value', 0),
-            current_value=report_data.get('current_value', 0),
-            daily_pnl=report_data.get('daily_pnl', 0),
-            daily_pnl_ratio=report_data.get('daily_pnl_ratio', 0),
-            orders_count=report_data.get('orders_count', 0),
-            positions_count=report_data.get('positions_count', 0),
-            alerts_count=report_data.get('alerts_count', 0),
-            positions_html=positions_html,
-            report_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        )
-
-        return self.send_email(to_emails, subject, content)
+            positions_html = _POSITIONS_DETAIL_TEMPLATE.render(positions=report_data['top_positions'])
+
+        # str.format不会计算表达式，盈亏颜色和符号需预先计算
+        daily_pnl = report_data.get('daily_pnl', 0)
+        daily_pnl_ratio = report_data.get('daily_pnl_ratio', 0)
+
+        content = _DAILY_REPORT_FORMAT({
+            'initial_value': report_data.get('initial_value', 0),
+            'current_value': report_data.get('current_value', 0),
+            'daily_pnl': daily_pnl,
+            'daily_pnl_ratio': daily_pnl_ratio,
+            'pnl_color': 'green' if daily_pnl >= 0 else 'red',
+            'pnl_sign': '+' if daily_pnl >= 0 else '',
+            'pnl_ratio_color': 'green' if daily_pnl_ratio >= 0 else 'red',
+            'pnl_ratio_sign': '+' if daily_pnl_ratio >= 0 else '',
+            'orders_count': report_data.get('orders_count', 0),
+            'positions_count': report_data.get('positions_count', 0),
+            'alerts_count': report_data.get('alerts_count', 0),
+            'positions_html': positions_html,
+            'report_time': _now_str()
+        })
+
+        return subject, content
 
     def send_system_notification(
         self,
@@ -353,6 +852,16 @@ class EmailService:
         details: Dict = None
     ) -> bool:
         """发送系统通知邮件"""
+        subject, content = self.render_system_notification(notification_type, message, details)
+        return self.send_email(to_emails, subject, content)
+
+    def render_system_notification(
+        self,
+        notification_type: str,
+        message: str,
+        details: Dict = None
+    ) -> Tuple[str, str]:
+        """生成系统通知邮件的主题和内容"""
         subject = f"系统通知 - {notification_type}"
 
         content = f"""
@@ -362,29 +871,25 @@ class EmailService:
             <p>亲爱的用户，</p>
             <p>系统有以下通知：</p>
             <div style="background-color: #e3f2fd; padding: 15px; border-radius: 5px;">
-                <p><strong>通知类型：</strong>{notification_type}</p>
-                <p><strong>消息内容：</strong>{message}</p>
-                <p><strong>通知时间：</strong>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p><strong>通知类型：</strong>{escape(notification_type)}</p>
+                <p><strong>消息内容：</strong>{escape(message)}</p>
+                <p><strong>通知时间：</strong>{_now_str()}</p>
             </div>
 
-            {f'<div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px; margin-top: 15px;"><h4>详细信息：</h4><pre>{json.dumps(details, indent=2, ensure_ascii=False)}</pre></div>' if details else ''}
+            {f'<div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px; margin-top: 15px;"><h4>详细信息：</h4><pre>{escape(_format_details(details))}</pre></div>' if details else ''}
 
             <p>感谢您使用 TradingAgents！</p>
         </body>
         </html>
         """
 
-        return self.send_email(to_emails, subject, content)
+        return subject, content
 
     def test_connection(self) -> bool:
         """测试邮件服务连接"""
         try:
-            server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
-
-            if self.config.use_tls:
-                server.starttls()
-
-            server.login(self.config.email_user, self.config.email_password)
+            # HTTP邮件API没有需要预先建立的连接，直接以测试邮件的发送结果为准
+            server = self._open_connection() if self.http_backend is None else None
 
             # 发送测试邮件给自己
             test_content = """
@@ -397,13 +902,16 @@ class EmailService:
             </html>
             """
 
-            self.send_email(
+            sent = self.send_email(
                 [self.config.email_user],
                 "邮件服务测试",
                 test_content
             )
 
-            server.quit()
+            if server is not None:
+                server.quit()
+            elif not sent:
+                return False
             logger.info("邮件服务测试成功")
             return True
 
@@ -415,6 +923,14 @@ class EmailService:
 class NotificationManager:
     """通知管理器"""
 
+    # 批量通知类型 -> (通知开关, 邮件渲染方法)
+    EVENT_TYPES = {
+        'trade_alert': ('trade_alerts', 'render_trade_alert'),
+        'risk_alert': ('risk_alerts', 'render_risk_alert'),
+        'daily_report': ('daily_reports', 'render_daily_report'),
+        'system_notification': ('system_notifications', 'render_system_notification'),
+    }
+
     def __init__(self, email_service: Optional[EmailService] = None):
         """
         初始化通知管理器
@@ -430,31 +946,46 @@ class NotificationManager:
         # 获取系统配置中的通知设置
         system_config = get_config()
         self.notification_settings = system_config.email_notification.notifications.copy()
-        self.notification_settings['email_recipients'] = system_config.email_notification.recipients.copy()
+        # 收件人以dict作为有序集合存储，去重且增删为O(1)
+        self._recipients: Dict[str, None] = dict.fromkeys(system_config.email_notification.recipients)
+
+    @property
+    def recipients(self) -> List[str]:
+        """收件人列表"""
+        return list(self._recipients)
 
     def set_notification_settings(self, settings: Dict[str, Any]):
-        """设置通知选项"""
+        """设置通知选项，email_recipients 会替换当前收件人列表"""
+        settings = dict(settings)
+        if 'email_recipients' in settings:
+            self._recipients = dict.fromkeys(settings.pop('email_recipients'))
         self.notification_settings.update(settings)
 
     def add_recipient(self, email: str):
         """添加收件人"""
-        if email not in self.notification_settings['email_recipients']:
-            self.notification_settings['email_recipients'].append(email)
+        self._recipients[email] = None
 
     def remove_recipient(self, email: str):
         """移除收件人"""
-        if email in self.notification_settings['email_recipients']:
-            self.notification_settings['email_recipients'].remove(email)
+        self._recipients.pop(email, None)
+
+    def will_send(self, kind: str) -> bool:
+        """
+        判断某类通知是否会实际发送，调用方可据此跳过报告数据的准备工作
+
+        Args:
+            kind: 通知开关名称，如 'trade_alerts', 'risk_alerts', 'daily_reports', 'system_notifications'
+        """
+        return bool(self.notification_settings.get(kind)) and bool(self._recipients)
 
     def send_trade_alert(self, symbol: str, trade_type: str, quantity: int, price: float, confidence: float):
         """发送交易提醒"""
-        if not self.notification_settings['trade_alerts']:
+        if not self.will_send('trade_alerts'):
+            if self.notification_settings.get('trade_alerts'):
+                logger.warning("未设置邮件收件人")
             return
 
-        recipients = self.notification_settings['email_recipients']
-        if not recipients:
-            logger.warning("未设置邮件收件人")
-            return
+        recipients = self.recipients
 
         self.email_service.send_trade_alert(
             recipients,
@@ -463,17 +994,15 @@ class NotificationManager:
             quantity,
             price,
             confidence,
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            _now_str()
         )
 
     def send_risk_alert(self, alert_type: str, symbol: str, severity: str, message: str, suggested_action: str):
         """发送风险预警"""
-        if not self.notification_settings['risk_alerts']:
+        if not self.will_send('risk_alerts'):
             return
 
-        recipients = self.notification_settings['email_recipients']
-        if not recipients:
-            return
+        recipients = self.recipients
 
         self.email_service.send_risk_alert(
             recipients,
@@ -482,28 +1011,22 @@ class NotificationManager:
             severity,
             message,
             suggested_action,
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            _now_str()
         )
 
     def send_daily_report(self, report_data: Dict[str, Any]):
         """发送每日报告"""
-        if not self.notification_settings['daily_reports']:
+        if not self.will_send('daily_reports'):
             return
 
-        recipients = self.notification_settings['email_recipients']
-        if not recipients:
-            return
-
-        self.email_service.send_daily_report(recipients, report_data)
+        self.email_service.send_daily_report(self.recipients, report_data)
 
     def send_system_notification(self, notification_type: str, message: str, details: Dict = None):
         """发送系统通知"""
-        if not self.notification_settings['system_notifications']:
+        if not self.will_send('system_notifications'):
             return
 
-        recipients = self.notification_settings['email_recipients']
-        if not recipients:
-            return
+        recipients = self.recipients
 
         self.email_service.send_system_notification(
             recipients,
@@ -512,6 +1035,68 @@ class NotificationManager:
             details
         )
 
+    async def send_many(self, events: List[Dict[str, Any]]) -> List[bool]:
+        """
+        并发发送一批通知
+
+        Args:
+            events: 通知列表，每项包含 'type'（trade_alert/risk_alert/daily_report/system_notification）
+                    及对应 send_* 方法的参数
+
+        Returns:
+            已发送邮件的发送结果，未启用的通知类型会被跳过
+        """
+        recipients = self.recipients
+        if not recipients:
+            return []
+
+        return await self.email_service.send_emails_async(recipients, self._render_events(events))
+
+    def send_batch(self, events: List[Dict[str, Any]]) -> List[bool]:
+        """send_many的同步版本，在事件循环中调用时逐封同步发送"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._send_many_in_new_loop(events))
+
+        recipients = self.recipients
+        if not recipients:
+            return []
+
+        return [
+            self.email_service.send_email(recipients, subject, content)
+            for subject, content in self._render_events(events)
+        ]
+
+    async def _send_many_in_new_loop(self, events: List[Dict[str, Any]]) -> List[bool]:
+        """在临时事件循环中发送，结束前关闭绑定到该循环的HTTP会话"""
+        try:
+            return await self.send_many(events)
+        finally:
+            if self.email_service.http_backend is not None:
+                await self.email_service.http_backend.close()
+
+    def _render_events(self, events: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """按通知开关过滤并生成各通知邮件的主题和内容"""
+        timestamp = _now_str()
+        emails = []
+        for event in events:
+            params = dict(event)
+            event_type = params.pop('type', None)
+            if event_type not in self.EVENT_TYPES:
+                # 单个无效事件不影响同批其他通知
+                logger.warning(f"跳过未知类型的通知事件: {event_type}")
+                continue
+
+            setting, render = self.EVENT_TYPES[event_type]
+            if not self.notification_settings.get(setting):
+                continue
+
+            if event_type in ('trade_alert', 'risk_alert'):
+                params.setdefault('timestamp', timestamp)
+            emails.append(getattr(self.email_service, render)(**params))
+        return emails
+
 
 # 默认邮件配置
 DEFAULT_EMAIL_CONFIG = EmailConfig(
@@ -3,17 +3,54 @@
 定义所有经纪商接口的标准规范
 """
 
+import asyncio
+import atexit
+import importlib
 import logging
+import logging.handlers
+import queue
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# 后台日志线程，configure_async_logging启用后设置
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_async_logging(handlers: Optional[List[logging.Handler]] = None) -> logging.handlers.QueueListener:
+    """
+    将根日志记录器的输出移到后台线程，事件循环中的日志调用只入队，不再阻塞在文件和终端写入上
+
+    Args:
+        handlers: 实际输出日志的处理器，为None时接管根日志记录器现有的处理器（没有时创建终端输出）
+
+    Returns:
+        已启动的QueueListener，进程退出时自动停止
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return _log_listener
+
+    root = logging.getLogger()
+    if handlers is None:
+        handlers = list(root.handlers) or [logging.StreamHandler()]
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    return _log_listener
+
 
 class OrderSide(Enum):
     """订单方向"""
@@ -38,7 +75,37 @@ class OrderStatus(Enum):
     REJECTED = "rejected"
 
 
-@dataclass
+# 订单批量分析使用的结构化数组类型，缺失的价格为NaN
+# 字符串字段为定长，numpy会静默截断超长的值，因此写入前由batch_from_dicts校验长度
+ORDER_BATCH_DTYPE = np.dtype([
+    ('order_id', 'U64'),
+    ('symbol', 'U32'),
+    ('side', 'U4'),
+    ('order_type', 'U10'),
+    ('status', 'U14'),
+    ('quantity', 'i8'),
+    ('price', 'f8'),
+    ('stop_price', 'f8'),
+    ('filled_quantity', 'i8'),
+    ('filled_price', 'f8'),
+    ('commission', 'f8'),
+])
+
+
+def _optional_float(value: Any) -> float:
+    """将可能缺失的价格转换为浮点数，缺失时为NaN"""
+    return float(value) if value else np.nan
+
+
+def _checked_str(order_data: Dict[str, Any], field: str) -> str:
+    """取出订单的字符串字段，超过ORDER_BATCH_DTYPE定长时报错而不是截断"""
+    value = str(order_data[field])
+    if len(value) > ORDER_BATCH_DTYPE.fields[field][0].itemsize // 4:
+        raise ValueError(f"订单字段 {field} 过长，无法放入批量数组: {value}")
+    return value
+
+
+@dataclass(slots=True)
 class RealOrder:
     """真实订单信息"""
     order_id: str
@@ -58,13 +125,48 @@ class RealOrder:
     exchange_order_id: Optional[str] = None
 
     def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now()
-        if self.updated_at is None:
-            self.updated_at = datetime.now()
+        # 调用方已提供时间时不读取时钟，两者都缺失时使用同一时间
+        if self.created_at is None or self.updated_at is None:
+            now = datetime.now()
+            if self.created_at is None:
+                self.created_at = now
+            if self.updated_at is None:
+                self.updated_at = now
 
+    @staticmethod
+    def batch_from_dicts(orders_data: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        将API返回的订单字典批量转换为结构化数组，用于订单分析，不逐个创建订单对象
+
+        Args:
+            orders_data: 订单字典列表（与get_orders解析的字段一致）
 
-@dataclass
+        Returns:
+            dtype为ORDER_BATCH_DTYPE的结构化数组
+
+        Raises:
+            ValueError: order_id或symbol超过ORDER_BATCH_DTYPE的定长
+                （numpy会静默截断定长字符串，这里改为显式报错）
+        """
+        return np.array([
+            (
+                _checked_str(order_data, 'order_id'),
+                _checked_str(order_data, 'symbol'),
+                order_data['side'],
+                order_data['order_type'],
+                order_data.get('status', 'pending'),
+                int(order_data['quantity']),
+                _optional_float(order_data.get('price')),
+                _optional_float(order_data.get('stop_price')),
+                int(order_data.get('filled_quantity', 0)),
+                _optional_float(order_data.get('filled_price')),
+                float(order_data.get('commission', 0)),
+            )
+            for order_data in orders_data
+        ], dtype=ORDER_BATCH_DTYPE)
+
+
+@dataclass(slots=True)
 class RealPosition:
     """真实持仓信息"""
     symbol: str
@@ -78,7 +180,7 @@ class RealPosition:
     last_updated: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class AccountInfo:
     """账户信息"""
     account_id: str
@@ -117,9 +219,35 @@ class MarketDataError(BrokerError):
     pass
 
 
+@dataclass(slots=True)
+class _SharedSession:
+    """共享HTTP会话及使用中的经纪商实例数"""
+    session: Any
+    users: int = 0
+
+
 class BaseBroker(ABC):
     """真实经纪商抽象基类"""
 
+    # 共享HTTP会话的连接池参数
+    CONNECTOR_OPTIONS = {
+        'limit': 100,
+        'limit_per_host': 20,
+        'ttl_dns_cache': 300,
+        'enable_cleanup_closed': True,
+        'keepalive_timeout': 75,
+        'happy_eyeballs_delay': 0.25,  # IPv6/IPv4交错建连，避开单一地址族的慢连接
+        'family': 0,                   # 同时解析IPv4和IPv6地址
+    }
+    SESSION_HEADERS = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'TradingAgents/1.0'
+    }
+    SESSION_TIMEOUT = 30  # 秒
+
+    # 同一API地址、同一事件循环中的经纪商实例共用会话和连接池: (base_url, 事件循环) -> 共享会话
+    _shared_sessions: Dict[Tuple[str, asyncio.AbstractEventLoop], _SharedSession] = {}
+
     def __init__(self, config: Dict[str, Any]):
         """
         初始化经纪商连接
@@ -131,6 +259,60 @@ class BaseBroker(ABC):
         self.is_connected = False
         self.session_token: Optional[str] = None
         self.account_info: Optional[AccountInfo] = None
+        self._shared_session: Optional[Tuple[Tuple[str, asyncio.AbstractEventLoop], _SharedSession]] = None
+
+    def _get_session(self, base_url: str) -> Any:
+        """
+        获取base_url在当前事件循环中的共享HTTP会话并登记为使用者，首次使用时创建
+
+        会话在经纪商实例之间复用，最后一个使用者调用_release_session时关闭
+        """
+        import aiohttp
+
+        key = (base_url, asyncio.get_running_loop())
+        if self._shared_session is not None and self._shared_session[0] == key:
+            return self._shared_session[1].session
+
+        entry = BaseBroker._shared_sessions.get(key)
+        if entry is None or entry.session.closed:
+            # 已结束的事件循环遗留的会话无法再关闭，只移除登记
+            for stale_key in [k for k in BaseBroker._shared_sessions if k[1].is_closed()]:
+                del BaseBroker._shared_sessions[stale_key]
+
+            entry = _SharedSession(aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self.CONNECTOR_OPTIONS),
+                timeout=aiohttp.ClientTimeout(total=self.SESSION_TIMEOUT),
+                headers=self.SESSION_HEADERS
+            ))
+            BaseBroker._shared_sessions[key] = entry
+
+        entry.users += 1
+        self._shared_session = (key, entry)
+        return entry.session
+
+    async def _release_session(self):
+        """注销对共享会话的使用，最后一个使用者关闭会话（需在会话所属的事件循环中调用）"""
+        if self._shared_session is None:
+            return
+        (key, entry), self._shared_session = self._shared_session, None
+
+        entry.users -= 1
+        if entry.users > 0:
+            return
+        if BaseBroker._shared_sessions.get(key) is entry:
+            del BaseBroker._shared_sessions[key]
+        if not entry.session.closed:
+            await entry.session.close()
+
+    @classmethod
+    async def close_shared_sessions(cls):
+        """关闭当前事件循环中创建的全部共享会话"""
+        loop = asyncio.get_running_loop()
+        for key, entry in list(BaseBroker._shared_sessions.items()):
+            if key[1] is loop:
+                del BaseBroker._shared_sessions[key]
+                if not entry.session.closed:
+                    await entry.session.close()
 
     @abstractmethod
     async def connect(self) -> bool:
@@ -275,6 +457,48 @@ class BaseBroker(ABC):
         """
         pass
 
+    async def get_quotes(self, symbols: List[str]) -> List[Union[Dict[str, float], BaseException]]:
+        """
+        并发获取多只股票的实时报价
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            与symbols顺序一致的报价列表，获取失败的位置为对应的异常对象
+        """
+        # 先创建全部协程再统一等待，使各请求同时发出
+        coros = [self.get_quote(symbol) for symbol in symbols]
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    async def get_market_data_batch(self, symbols: List[str]) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        并发获取多只股票的市场数据
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            与symbols顺序一致的市场数据列表，获取失败的位置为对应的异常对象
+        """
+        coros = [self.get_market_data(symbol) for symbol in symbols]
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    async def ping(self) -> bool:
+        """
+        轻量心跳检查，默认对API根地址发送HEAD请求，子类可改用专用心跳接口
+
+        Returns:
+            服务是否可达
+        """
+        session = getattr(self, 'session', None)
+        base_url = getattr(self, 'base_url', None)
+        if session is None or base_url is None:
+            return False
+
+        async with session.head(base_url) as response:
+            return response.status < 500
+
     async def check_connection(self) -> bool:
         """
         检查连接状态
@@ -283,11 +507,17 @@ class BaseBroker(ABC):
             是否连接正常
         """
         try:
-            # 通过获取账户信息来检查连接
+            if await self.ping():
+                return True
+        except Exception as e:
+            logger.debug("心跳检查失败: %s", e)
+
+        try:
+            # 心跳失败时通过获取账户信息确认连接
             await self.get_account_info()
             return True
         except Exception as e:
-            logger.error(f"连接检查失败: {str(e)}")
+            logger.error("连接检查失败: %s", e)
             return False
 
     def format_symbol(self, symbol: str) -> str:
@@ -330,19 +560,33 @@ class BaseBroker(ABC):
 class BrokerFactory:
     """经纪商工厂类"""
 
-    _brokers = {}
+    # 值为经纪商类，或 "模块路径:类名" 形式的延迟导入路径
+    _brokers: Dict[str, Union[type, str]] = {}
 
     @classmethod
-    def register_broker(cls, name: str, broker_class: type):
+    def register_broker(cls, name: str, broker_class: Union[type, str]):
         """
         注册经纪商类型
 
         Args:
             name: 经纪商名称
-            broker_class: 经纪商类
+            broker_class: 经纪商类，或 "模块路径:类名" 形式的导入路径（首次创建时才导入）
         """
         cls._brokers[name.lower()] = broker_class
-        logger.info(f"已注册经纪商: {name}")
+        logger.info("已注册经纪商: %s", name)
+
+    @classmethod
+    def _resolve_broker_class(cls, name: str) -> Optional[type]:
+        """解析经纪商类，延迟导入路径在首次使用时导入并缓存"""
+        broker_class = cls._brokers.get(name)
+        if isinstance(broker_class, str):
+            module_path, _, class_name = broker_class.partition(':')
+            try:
+                broker_class = getattr(importlib.import_module(module_path), class_name)
+            except (ImportError, AttributeError) as e:
+                raise ValueError(f"经纪商 {name} 模块加载失败: {e}") from e
+            cls._brokers[name] = broker_class
+        return broker_class
 
     @classmethod
     async def create_broker(cls, broker_type: str, config: Dict[str, Any]) -> BaseBroker:
@@ -356,7 +600,7 @@ class BrokerFactory:
         Returns:
             经纪商实例
         """
-        broker_class = cls._brokers.get(broker_type.lower())
+        broker_class = cls._resolve_broker_class(broker_type.lower())
         if not broker_class:
             raise ValueError(f"不支持的经纪商类型: {broker_type}")
 
@@ -364,7 +608,7 @@ class BrokerFactory:
 
         # 尝试连接和认证
         if await broker.connect() and await broker.authenticate():
-            logger.info(f"经纪商 {broker_type} 连接成功")
+            logger.info("经纪商 %s 连接成功", broker_type)
             return broker
         else:
             raise ConnectionError(f"经纪商 {broker_type} 连接失败")
@@ -378,14 +622,6 @@ class BrokerFactory:
 # 注册默认经纪商（将在具体实现中注册）
 def register_default_brokers():
     """注册默认经纪商"""
-    try:
-        from .huatai_broker import HuataiBroker
-        BrokerFactory.register_broker("huatai", HuataiBroker)
-    except ImportError:
-        logger.warning("华泰经纪商模块未找到")
-
-    try:
-        from .guangfa_broker import GuangfaBroker
-        BrokerFactory.register_broker("guangfa", GuangfaBroker)
-    except ImportError:
-        logger.warning("广发经纪商模块未找到")
\ No newline at end of file
+    # 只登记导入路径，经纪商模块（及aiohttp）在首次创建实例时才导入
+    BrokerFactory.register_broker("huatai", f"{__package__}.huatai_broker:HuataiBroker")
+    BrokerFactory.register_broker("guangfa", f"{__package__}.huatai_broker:GuangfaBroker")
\ No newline at end of file
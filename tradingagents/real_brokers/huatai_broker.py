@@ -4,24 +4,81 @@
 """
 
 import asyncio
+import functools
 import json
 import hashlib
 import hmac
 import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import aiohttp
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 快速JSON解析（可选依赖），未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 流式JSON解析（可选依赖），未安装时大响应也整体解析
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 快速ISO 8601时间解析（可选依赖），未安装时使用datetime.fromisoformat
+try:
+    from ciso8601 import parse_datetime
+except ImportError:
+    parse_datetime = datetime.fromisoformat
 
 from .base_broker import (
     BaseBroker, AccountInfo, RealPosition, RealOrder,
     OrderSide, OrderType, OrderStatus, BrokerError
 )
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 接口返回值 -> 枚举成员，避免逐条调用枚举构造
+_SIDE_MAP = {member.value: member for member in OrderSide}
+_TYPE_MAP = {member.value: member for member in OrderType}
+_STATUS_MAP = {member.value: member for member in OrderStatus}
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_huatai_symbol(symbol: str) -> str:
+    """华泰证券股票代码格式：A股加SZ/SH后缀，如 000001.SZ"""
+    if symbol.endswith('.SZ') or symbol.endswith('.SH'):
+        return symbol
+
+    # 根据股票代码判断市场
+    if symbol.startswith('6'):
+        return f"{symbol}.SH"
+    elif symbol.startswith(('0', '3')):
+        return f"{symbol}.SZ"
+    else:
+        return symbol
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _json_dumps(value: Any) -> bytes:
+    """序列化请求体"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode('utf-8')
+
+
+@functools.lru_cache(maxsize=1024)
+def _order_body_prefix(symbol: str, side: str, order_type: str, time_in_force: str) -> bytes:
+    """订单请求体中不变的部分（去掉结尾的右花括号），数量和价格在每次下单时拼接"""
+    return _json_dumps({
+        'symbol': symbol,
+        'side': side,
+        'order_type': order_type,
+        'time_in_force': time_in_force
+    })[:-1]
+
 
 class HuataiBroker(BaseBroker):
     """华泰证券经纪商实现"""
@@ -29,6 +86,12 @@ class HuataiBroker(BaseBroker):
     BASE_URL = "https://openapi.htsc.com.cn"
     SANDBOX_URL = "https://openapi-sandbox.htsc.com.cn"
 
+    # 报价和市场数据的默认缓存有效期（秒）
+    QUOTE_CACHE_TTL = 0.2
+
+    # 响应体超过该大小（字节）或长度未知时，持仓和订单列表边下载边解析
+    STREAM_PARSE_THRESHOLD = 256 * 1024
+
     def __init__(self, config: Dict[str, Any]):
         """
         初始化华泰证券连接
@@ -40,6 +103,8 @@ class HuataiBroker(BaseBroker):
                 - account_id: 资金账户
                 - password: 交易密码
                 - sandbox: 是否使用沙箱环境（默认False）
+                - sign_method: 签名算法，'sha256'（默认）或 'hmac-sha256'
+                - quote_cache_ttl: 报价和市场数据缓存有效期（秒，默认0.2，0为禁用）
         """
         super().__init__(config)
 
@@ -48,50 +113,75 @@ class HuataiBroker(BaseBroker):
         self.account_id = config['account_id']
         self.password = config['password']
         self.sandbox = config.get('sandbox', False)
+        self.quote_cache_ttl = config.get('quote_cache_ttl', self.QUOTE_CACHE_TTL)
+
+        # 报价缓存: (类型, 股票代码) -> (获取时间, 结果)，按写入时间排列，写入时清理过期条目；进行中的请求供并发调用方共享
+        self._quote_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+        self.sign_method = config.get('sign_method', 'sha256')
+        if self.sign_method not in ('sha256', 'hmac-sha256'):
+            raise ValueError(f"不支持的签名算法: {self.sign_method}")
+
+        # 签名状态预先吸收固定的app_key前缀，每次请求只需复制后写入时间戳
+        self._app_secret_bytes = self.app_secret.encode()
+        if self.sign_method == 'hmac-sha256':
+            # HMAC以app_secret为密钥，密钥处理只做一次
+            self._sig_prefix_hasher = hmac.new(self._app_secret_bytes, self.app_key.encode(), hashlib.sha256)
+        else:
+            self._sig_prefix_hasher = hashlib.sha256(self.app_key.encode())
 
         # API地址
         self.base_url = self.SANDBOX_URL if self.sandbox else self.BASE_URL
 
-        # HTTP会话
-        self.session: Optional[aiohttp.ClientSession] = None
+        # 预先拼接各接口地址，带参数的地址绑定format方法
+        self._url_account = f"{self.base_url}/api/account/info"
+        self._url_ping = f"{self.base_url}/api/ping"
+        self._url_positions = f"{self.base_url}/api/positions"
+        self._url_orders = f"{self.base_url}/api/orders"
+        self._url_order_fmt = (self.base_url + "/api/orders/{}").format
+        self._url_cancel_fmt = (self.base_url + "/api/orders/{}/cancel").format
+        self._url_market_fmt = (self.base_url + "/api/market/data/{}").format
+        self._url_quote_fmt = (self.base_url + "/api/quotes/{}").format
+
+        # HTTP会话（同一API地址的实例共享）
+        self.session: Optional["aiohttp.ClientSession"] = None
 
         # 认证令牌
         self.access_token: Optional[str] = None
         self.token_expires: Optional[datetime] = None
 
+        # 认证头中不随请求变化的部分，令牌变化时重建
+        self._base_headers: Dict[str, str] = {}
+        self._base_headers_token: Optional[str] = None
+        self._rebuild_base_headers()
+
     async def connect(self) -> bool:
         """连接到华泰证券API"""
         try:
-            # 创建HTTP会话
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(
-                timeout=timeout,
-                headers={
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'TradingAgents/1.0'
-                }
-            )
+            # 获取共享HTTP会话
+            self.session = self._get_session(self.base_url)
 
             logger.info("华泰证券连接已建立")
             return True
 
         except Exception as e:
-            logger.error(f"华泰证券连接失败: {str(e)}")
+            logger.error("华泰证券连接失败: %s", e)
             return False
 
     async def disconnect(self) -> bool:
         """断开华泰证券连接"""
         try:
-            if self.session:
-                await self.session.close()
-                self.session = None
+            # 共享会话在没有其他实例使用时关闭
+            await self._release_session()
+            self.session = None
 
             self.is_connected = False
             logger.info("华泰证券连接已断开")
             return True
 
         except Exception as e:
-            logger.error(f"断开华泰证券连接失败: {str(e)}")
+            logger.error("断开华泰证券连接失败: %s", e)
             return False
 
     async def authenticate(self) -> bool:
@@ -112,7 +202,7 @@ class HuataiBroker(BaseBroker):
             return True
 
         except Exception as e:
-            logger.error(f"华泰证券认证失败: {str(e)}")
+            logger.error("华泰证券认证失败: %s", e)
             return False
 
     async def get_account_info(self) -> AccountInfo:
@@ -121,14 +211,14 @@ class HuataiBroker(BaseBroker):
             raise ConnectionError("认证已过期，请重新认证")
 
         try:
-            endpoint = f"{self.base_url}/api/account/info"
+            endpoint = self._url_account
             headers = self._get_auth_headers()
 
             async with self.session.get(endpoint, headers=headers) as response:
                 if response.status != 200:
                     raise BrokerError(f"获取账户信息失败: HTTP {response.status}")
 
-                data = await response.json()
+                data = await response.json(loads=_json_loads)
 
                 # 解析账户信息
                 account_data = data.get('data', {})
@@ -149,7 +239,7 @@ class HuataiBroker(BaseBroker):
                 return account_info
 
         except Exception as e:
-            logger.error(f"获取账户信息失败: {str(e)}")
+            logger.error("获取账户信息失败: %s", e)
             raise
 
     async def get_positions(self) -> List[RealPosition]:
@@ -158,18 +248,17 @@ class HuataiBroker(BaseBroker):
             raise ConnectionError("认证已过期，请重新认证")
 
         try:
-            endpoint = f"{self.base_url}/api/positions"
+            endpoint = self._url_positions
             headers = self._get_auth_headers()
 
             async with self.session.get(endpoint, headers=headers) as response:
                 if response.status != 200:
                     raise BrokerError(f"获取持仓失败: HTTP {response.status}")
 
-                data = await response.json()
-                positions_data = data.get('data', {}).get('positions', [])
-
                 positions = []
-                for pos_data in positions_data:
+                # 同一批持仓共用一个更新时间
+                now = datetime.now()
+                async for pos_data in self._iter_response_items(response, 'positions'):
                     position = RealPosition(
                         symbol=pos_data['symbol'],
                         quantity=int(pos_data['quantity']),
@@ -179,14 +268,14 @@ class HuataiBroker(BaseBroker):
                         unrealized_pnl=float(pos_data['unrealized_pnl']),
                         realized_pnl=float(pos_data.get('realized_pnl', 0)),
                         cost_basis=float(pos_data['cost_basis']),
-                        last_updated=datetime.now()
+                        last_updated=now
                     )
                     positions.append(position)
 
                 return positions
 
         except Exception as e:
-            logger.error(f"获取持仓失败: {str(e)}")
+            logger.error("获取持仓失败: %s", e)
             raise
 
     async def get_orders(self, status: Optional[str] = None) -> List[RealOrder]:
@@ -195,7 +284,7 @@ class HuataiBroker(BaseBroker):
             raise ConnectionError("认证已过期，请重新认证")
 
         try:
-            endpoint = f"{self.base_url}/api/orders"
+            endpoint = self._url_orders
             headers = self._get_auth_headers()
             params = {}
 
@@ -206,33 +295,37 @@ class HuataiBroker(BaseBroker):
                 if response.status != 200:
                     raise BrokerError(f"获取订单失败: HTTP {response.status}")
 
-                data = await response.json()
-                orders_data = data.get('data', {}).get('orders', [])
-
                 orders = []
-                for order_data in orders_data:
-                    order = RealOrder(
+                # 循环内使用局部变量，减少全局名称查找
+                _parse = parse_datetime
+                _order = RealOrder
+                side_map, type_map, status_map = _SIDE_MAP, _TYPE_MAP, _STATUS_MAP
+                async for order_data in self._iter_response_items(response, 'orders'):
+                    get = order_data.get
+                    price = get('price')
+                    stop_price = get('stop_price')
+                    filled_price = get('filled_price')
+                    orders.append(_order(
                         order_id=order_data['order_id'],
                         symbol=order_data['symbol'],
-                        side=OrderSide(order_data['side']),
-                        order_type=OrderType(order_data['order_type']),
+                        side=side_map[order_data['side']],
+                        order_type=type_map[order_data['order_type']],
                         quantity=int(order_data['quantity']),
-                        price=float(order_data.get('price')) if order_data.get('price') else None,
-                        stop_price=float(order_data.get('stop_price')) if order_data.get('stop_price') else None,
-                        status=OrderStatus(order_data.get('status', 'pending')),
-                        filled_quantity=int(order_data.get('filled_quantity', 0)),
-                        filled_price=float(order_data.get('filled_price')) if order_data.get('filled_price') else None,
-                        commission=float(order_data.get('commission', 0)),
-                        created_at=datetime.fromisoformat(order_data['created_at']),
-                        updated_at=datetime.fromisoformat(order_data['updated_at']),
-                        exchange_order_id=order_data.get('exchange_order_id')
-                    )
-                    orders.append(order)
+                        price=float(price) if price else None,
+                        stop_price=float(stop_price) if stop_price else None,
+                        status=status_map[get('status', 'pending')],
+                        filled_quantity=int(get('filled_quantity', 0)),
+                        filled_price=float(filled_price) if filled_price else None,
+                        commission=float(get('commission', 0)),
+                        created_at=_parse(order_data['created_at']),
+                        updated_at=_parse(order_data['updated_at']),
+                        exchange_order_id=get('exchange_order_id')
+                    ))
 
                 return orders
 
         except Exception as e:
-            logger.error(f"获取订单失败: {str(e)}")
+            logger.error("获取订单失败: %s", e)
             raise
 
     async def place_order(
@@ -253,39 +346,37 @@ class HuataiBroker(BaseBroker):
             raise ConnectionError("认证已过期，请重新认证")
 
         try:
-            endpoint = f"{self.base_url}/api/orders"
+            endpoint = self._url_orders
             headers = self._get_auth_headers()
 
-            # 构建订单数据
-            order_data = {
-                'symbol': self.format_symbol(symbol),
-                'quantity': quantity,
-                'side': side,
-                'order_type': order_type,
-                'time_in_force': time_in_force
-            }
-
+            # 构建订单数据：复用预编码的不变部分，只序列化数量和价格
+            body = [
+                _order_body_prefix(self.format_symbol(symbol), side, order_type, time_in_force),
+                b',"quantity":', _json_dumps(quantity)
+            ]
             if price is not None:
-                order_data['price'] = price
+                body += (b',"price":', _json_dumps(price))
             if stop_price is not None:
-                order_data['stop_price'] = stop_price
+                body += (b',"stop_price":', _json_dumps(stop_price))
+            body.append(b'}')
 
-            async with self.session.post(endpoint, headers=headers, json=order_data) as response:
+            # 会话默认请求头已设置 Content-Type: application/json
+            async with self.session.post(endpoint, headers=headers, data=b''.join(body)) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
                     raise BrokerError(f"提交订单失败: HTTP {response.status}, {error_text}")
 
-                data = await response.json()
+                data = await response.json(loads=_json_loads)
                 order_id = data.get('data', {}).get('order_id')
 
                 if not order_id:
                     raise BrokerError("订单提交失败：未返回订单ID")
 
-                logger.info(f"订单提交成功: {order_id}")
+                logger.info("订单提交成功: %s", order_id)
                 return order_id
 
         except Exception as e:
-            logger.error(f"提交订单失败: {str(e)}")
+            logger.error("提交订单失败: %s", e)
             raise
 
     async def cancel_order(self, order_id: str) -> bool:
@@ -294,19 +385,19 @@ class HuataiBroker(BaseBroker):
             raise ConnectionError("认证已过期，请重新认证")
 
         try:
-            endpoint = f"{self.base_url}/api/orders/{order_id}/cancel"
+            endpoint = self._url_cancel_fmt(order_id)
             headers = self._get_auth_headers()
 
             async with self.session.post(endpoint, headers=headers) as response:
                 if response.status == 200:
-                    logger.info(f"订单取消成功: {order_id}")
+                    logger.info("订单取消成功: %s", order_id)
                     return True
                 else:
-                    logger.warning(f"订单取消失败: {order_id}, HTTP {response.status}")
+                    logger.warning("订单取消失败: %s, HTTP %s", order_id, response.status)
                     return False
 
         except Exception as e:
-            logger.error(f"取消订单失败: {str(e)}")
+            logger.error("取消订单失败: %s", e)
             return False
 
     async def get_order_status(self, order_id: str) -> RealOrder:
@@ -315,14 +406,14 @@ class HuataiBroker(BaseBroker):
             raise ConnectionError("认证已过期，请重新认证")
 
         try:
-            endpoint = f"{self.base_url}/api/orders/{order_id}"
+            endpoint = self._url_order_fmt(order_id)
             headers = self._get_auth_headers()
 
             async with self.session.get(endpoint, headers=headers) as response:
                 if response.status != 200:
                     raise BrokerError(f"获取订单状态失败: HTTP {response.status}")
 
-                data = await response.json()
+                data = await response.json(loads=_json_loads)
                 order_data = data.get('data', {})
 
                 order = RealOrder(
@@ -337,45 +428,56 @@ class HuataiBroker(BaseBroker):
                     filled_quantity=int(order_data.get('filled_quantity', 0)),
                     filled_price=float(order_data.get('filled_price')) if order_data.get('filled_price') else None,
                     commission=float(order_data.get('commission', 0)),
-                    created_at=datetime.fromisoformat(order_data['created_at']),
-                    updated_at=datetime.fromisoformat(order_data['updated_at']),
+                    created_at=parse_datetime(order_data['created_at']),
+                    updated_at=parse_datetime(order_data['updated_at']),
                     exchange_order_id=order_data.get('exchange_order_id')
                 )
 
                 return order
 
         except Exception as e:
-            logger.error(f"获取订单状态失败: {str(e)}")
+            logger.error("获取订单状态失败: %s", e)
             raise
 
     async def get_market_data(self, symbol: str) -> Dict[str, Any]:
-        """获取市场数据"""
+        """获取市场数据（短时缓存）"""
+        return await self._cached_fetch('market_data', self.format_symbol(symbol), self._fetch_market_data)
+
+    async def _fetch_market_data(self, symbol: str) -> Dict[str, Any]:
+        """请求市场数据，symbol已格式化"""
         try:
-            endpoint = f"{self.base_url}/api/market/data/{self.format_symbol(symbol)}"
+            endpoint = self._url_market_fmt(symbol)
             headers = self._get_auth_headers()
 
             async with self.session.get(endpoint, headers=headers) as response:
                 if response.status != 200:
                     raise BrokerError(f"获取市场数据失败: HTTP {response.status}")
 
-                data = await response.json()
+                data = await response.json(loads=_json_loads)
                 return data.get('data', {})
 
         except Exception as e:
-            logger.error(f"获取市场数据失败: {str(e)}")
+            logger.error("获取市场数据失败: %s", e)
             raise
 
     async def get_quote(self, symbol: str) -> Dict[str, float]:
-        """获取实时报价"""
+        """获取实时报价（短时缓存）"""
+        return await self._cached_fetch('quote', self.format_symbol(symbol), self._fetch_quote)
+
+    async def _fetch_quote(self, symbol: str) -> Dict[str, float]:
+        """请求实时报价，symbol已格式化"""
         try:
-            endpoint = f"{self.base_url}/api/quotes/{self.format_symbol(symbol)}"
+            endpoint = self._url_quote_fmt(symbol)
             headers = self._get_auth_headers()
+            # 报价响应很小，不压缩；持仓、订单等大响应仍使用gzip
+            headers['Accept-Encoding'] = 'identity'
 
             async with self.session.get(endpoint, headers=headers) as response:
                 if response.status != 200:
                     raise BrokerError(f"获取报价失败: HTTP {response.status}")
 
-                data = await response.json()
+                # 直接解析原始字节，跳过response.json()的content-type检查和字符集探测
+                data = _json_loads(await response.read())
                 quote_data = data.get('data', {})
 
                 return {
@@ -390,9 +492,86 @@ class HuataiBroker(BaseBroker):
                 }
 
         except Exception as e:
-            logger.error(f"获取报价失败: {str(e)}")
+            logger.error("获取报价失败: %s", e)
             raise
 
+    async def _cached_fetch(
+        self,
+        kind: str,
+        symbol: str,
+        fetch: Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        缓存有效期内直接返回上次结果；同一代码已有请求进行中时等待该请求，不重复发起
+
+        Returns:
+            结果的浅拷贝，调用方修改不会影响缓存
+        """
+        key = (kind, symbol)
+        entry = self._quote_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.quote_cache_ttl:
+            return dict(entry[1])
+
+        future = self._inflight.get(key)
+        if future is not None:
+            return dict(await asyncio.shield(future))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch(symbol)
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时标记异常已读取，避免事件循环告警
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self._store_quote(key, result)
+            future.set_result(result)
+            return dict(result)
+        finally:
+            del self._inflight[key]
+
+    def _store_quote(self, key: Tuple[str, str], result: Dict[str, Any]):
+        """写入报价缓存，同时清理已过期的条目，轮询大量股票时缓存不会无限增长"""
+        now = time.monotonic()
+        cache = self._quote_cache
+        # 重新插入使条目按写入时间排列，从最早的条目开始清理，遇到未过期的即停止
+        cache.pop(key, None)
+        while cache:
+            oldest = next(iter(cache))
+            if now - cache[oldest][0] < self.quote_cache_ttl:
+                break
+            del cache[oldest]
+        cache[key] = (now, result)
+
+    async def _iter_response_items(self, response: "aiohttp.ClientResponse", key: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐条返回响应中 data.<key> 列表的元素
+
+        大响应用ijson边读边解析，不同时持有完整的原始JSON和解析后的列表；小响应整体解析更快
+        """
+        content_length = response.content_length
+        if ijson is not None and (content_length is None or content_length > self.STREAM_PARSE_THRESHOLD):
+            async for item in ijson.items_async(response.content, f'data.{key}.item', use_float=True):
+                yield item
+            return
+
+        data = await response.json(loads=_json_loads)
+        for item in data.get('data', {}).get(key, []):
+            yield item
+
+    async def ping(self) -> bool:
+        """心跳检查，只携带应用密钥，不解析响应体"""
+        if self.session is None:
+            return False
+
+        async with self.session.get(self._url_ping, headers={'X-App-Key': self.app_key}) as response:
+            return response.status == 200
+
     def _check_auth(self) -> bool:
         """检查认证状态"""
         if not self.access_token:
@@ -407,38 +586,35 @@ class HuataiBroker(BaseBroker):
     def _get_auth_headers(self) -> Dict[str, str]:
         """获取认证头信息"""
         # 华泰证券签名算法（示例）
-        timestamp = str(int(time.time() * 1000))
+        timestamp = str(time.time_ns() // 1_000_000)
         signature = self._generate_signature(timestamp)
 
-        headers = {
+        if self.access_token is not self._base_headers_token:
+            self._rebuild_base_headers()
+
+        return {**self._base_headers, 'X-Timestamp': timestamp, 'X-Signature': signature}
+
+    def _rebuild_base_headers(self):
+        """根据当前访问令牌重建固定的认证头"""
+        self._base_headers = {
             'Authorization': f'Bearer {self.access_token}',
-            'X-Timestamp': timestamp,
-            'X-Signature': signature,
             'X-App-Key': self.app_key
         }
-
-        return headers
+        self._base_headers_token = self.access_token
 
     def _generate_signature(self, timestamp: str) -> str:
         """生成API签名"""
-        # 华泰证券签名算法示例
-        message = f"{self.app_key}{timestamp}{self.app_secret}"
-        signature = hashlib.sha256(message.encode()).hexdigest()
-        return signature
+        hasher = self._sig_prefix_hasher.copy()
+        hasher.update(timestamp.encode())
+        if self.sign_method == 'sha256':
+            # 华泰证券签名算法示例: sha256(app_key + timestamp + app_secret)
+            hasher.update(self._app_secret_bytes)
+        # hmac-sha256: HMAC(app_secret, app_key + timestamp)
+        return hasher.hexdigest()
 
     def format_symbol(self, symbol: str) -> str:
-        """格式化股票代码"""
-        # 华泰证券股票代码格式：A股加SZ/SH后缀，如 000001.SZ
-        if symbol.endswith('.SZ') or symbol.endswith('.SH'):
-            return symbol
-
-        # 根据股票代码判断市场
-        if symbol.startswith('6'):
-            return f"{symbol}.SH"
-        elif symbol.startswith(('0', '3')):
-            return f"{symbol}.SZ"
-        else:
-            return symbol
+        """格式化股票代码（结果按代码缓存）"""
+        return _format_huatai_symbol(symbol)
 
 
 class GuangfaBroker(BaseBroker):
@@ -455,16 +631,16 @@ class GuangfaBroker(BaseBroker):
         self.account_id = config['account_id']
 
         self.base_url = self.BASE_URL
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional["aiohttp.ClientSession"] = None
 
     async def connect(self) -> bool:
         """连接到广发证券API"""
         try:
-            self.session = aiohttp.ClientSession()
+            self.session = self._get_session(self.base_url)
             logger.info("广发证券连接已建立")
             return True
         except Exception as e:
-            logger.error(f"广发证券连接失败: {str(e)}")
+            logger.error("广发证券连接失败: %s", e)
             return False
 
     async def authenticate(self) -> bool:
@@ -474,7 +650,7 @@ class GuangfaBroker(BaseBroker):
             logger.info("广发证券认证成功")
             return True
         except Exception as e:
-            logger.error(f"广发证券认证失败: {str(e)}")
+            logger.error("广发证券认证失败: %s", e)
             return False
 
     # 其他方法实现类似华泰证券，省略具体实现
@@ -546,6 +722,6 @@ class GuangfaBroker(BaseBroker):
 
     async def disconnect(self) -> bool:
         """断开连接 - 简化实现"""
-        if self.session:
-            await self.session.close()
+        await self._release_session()
+        self.session = None
         return True
\ No newline at end of file
@@ -3,8 +3,6 @@ TradingAgents Streamlit应用启动器
 提供现代化的Web界面，支持多页面导航和实时数据更新
 """
 
-import streamlit as st
-from main import main
 import sys
 from pathlib import Path
 
@@ -14,17 +12,5 @@ sys.path.insert(0, str(project_root))
 
 from tradingagents.streamlit_app.main import main
 
-# 页面标题和图标
-st.set_page_config(
-    page_title="TradingAgents - 智能交易平台",
-    page_icon="🚀",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# 启动主应用
-if __name__ == "__main__":
-    main()
-else:
-    # 当通过streamlit run直接启动时也运行main
-    main()
\ No newline at end of file
+# 启动主应用，streamlit run每次重新执行脚本时调用一次（页面配置和会话状态在main中设置）
+main()
@@ -6,45 +6,123 @@ TradingAgents Streamlit现代化前端应用
 import streamlit as st
 import streamlit_shadcn_ui as ui
 import pandas as pd
+import pyarrow as pa
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 import json
+import types
+from typing import Dict, Final, Optional, Tuple
 
-# 设置页面配置
-st.set_page_config(
-    page_title="TradingAgents - 智能交易平台",
-    page_icon="🚀",
-    layout="wide",
-    initial_sidebar_state="expanded",
-    menu_items={
-        'Get Help': 'https://docs.tradingagents.ai',
-        'Report a bug': 'https://github.com/TauricResearch/TradingAgents/issues',
-        'About': 'TradingAgents v2.0 - 多智能体LLM交易系统'
-    }
-)
+# 面板级局部重新运行：面板内的交互只重新执行该面板，旧版Streamlit没有此功能时按普通函数执行
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
 
 # 导入后端服务（这里需要根据实际的后端API调整）
 # from ..api.client import TradingAPIClient
 
-# 初始化会话状态
-if 'portfolio_data' not in st.session_state:
-    st.session_state.portfolio_data = {
-        'total_value': 100000.0,
-        'daily_pnl': 2500.0,
-        'positions': [],
-        'trades': [],
-        'alerts': []
+def _sync_market_soa():
+    """
+    将market_data（股票 -> 行情字典）转换为按列存放的NumPy数组，行情数据更新后调用一次
+
+    渲染时直接使用这些数组，不再逐个股票读取字典字段
+    """
+    data = st.session_state.market_data
+    n = len(data)
+    st.session_state.market_soa = {
+        'symbols': np.array(list(data), dtype=str),
+        'prices': np.fromiter((v['price'] for v in data.values()), 'f8', n),
+        'changes': np.fromiter((v['change'] for v in data.values()), 'f8', n),
+        'volumes': np.fromiter((v['volume'] for v in data.values()), 'i8', n)
     }
 
-if 'market_data' not in st.session_state:
-    st.session_state.market_data = {
-        'AAPL': {'price': 150.0, 'change': 2.5, 'volume': 1000000},
-        'GOOGL': {'price': 2500.0, 'change': -15.0, 'volume': 500000},
-        'MSFT': {'price': 300.0, 'change': 5.0, 'volume': 800000}
+def setup_page():
+    """
+    设置页面配置并初始化会话状态
+
+    模块只在进程内首次导入时执行，每次脚本运行（包括新的浏览器会话）都需要在main开头调用
+    """
+    st.set_page_config(
+        page_title="TradingAgents - 智能交易平台",
+        page_icon="🚀",
+        layout="wide",
+        initial_sidebar_state="expanded",
+        menu_items={
+            'Get Help': 'https://docs.tradingagents.ai',
+            'Report a bug': 'https://github.com/TauricResearch/TradingAgents/issues',
+            'About': 'TradingAgents v2.0 - 多智能体LLM交易系统'
+        }
+    )
+
+    if 'portfolio_data' not in st.session_state:
+        st.session_state.portfolio_data = {
+            'total_value': 100000.0,
+            'daily_pnl': 2500.0,
+            'positions': [],
+            'trades': [],
+            'alerts': []
+        }
+
+    if 'market_data' not in st.session_state:
+        st.session_state.market_data = {
+            'AAPL': {'price': 150.0, 'change': 2.5, 'volume': 1000000},
+            'GOOGL': {'price': 2500.0, 'change': -15.0, 'volume': 500000},
+            'MSFT': {'price': 300.0, 'change': 5.0, 'volume': 800000}
+        }
+
+    if 'market_soa' not in st.session_state:
+        _sync_market_soa()
+
+# 状态 -> (颜色, 图标)
+_STATUS_STYLE: Final[Dict[str, Tuple[str, str]]] = {
+    'success': ('green', '✅'),
+    'warning': ('yellow', '⚠️'),
+    'info': ('blue', 'ℹ️')
+}
+
+# 状态 -> 各部位的样式类名，模块加载时生成一次，渲染时只做字典查找
+_ACTIVITY_CN: Final[Dict[str, Dict[str, str]]] = {
+    status: {
+        'icon': icon,
+        'text': f"text-{color}-600",
+        'time': f"text-{color}-600 font-mono text-sm",
+        'badge': f"mx-2 px-2 py-1 bg-{color}-100 text-{color}-800 rounded text-xs",
+        'box': f"mb-2 p-2 border-l-4 border-{color}-500 bg-gray-50"
     }
+    for status, (color, icon) in _STATUS_STYLE.items()
+}
+
+# 设置页面的固定选项，跨会话共享且不可修改
+_DATA_PROVIDERS = types.MappingProxyType({
+    "股票数据": ("yfinance", "alpha_vantage", "本地数据"),
+    "技术指标": ("yfinance", "alpha_vantage", "本地计算"),
+    "基本面数据": ("alpha_vantage", "本地数据"),
+    "新闻数据": ("alpha_vantage", "google_news", "本地数据")
+})
+
+# (服务名称, 密钥标识)
+_API_KEYS = (
+    ("华泰证券", "ht_app_key"),
+    ("广发证券", "gf_app_key"),
+    ("OpenAI", "openai_key"),
+    ("邮件服务", "email_key")
+)
+
+# 两次手动刷新之间的最小间隔（秒），连续点击时不重复生成数据
+REFRESH_DEBOUNCE_SECONDS = 0.1
+
+def _refresh_data():
+    """
+    刷新数据：清除缓存的模拟数据，本次运行中重新生成；距上次刷新不足REFRESH_DEBOUNCE_SECONDS时忽略
+
+    点击按钮本身已触发重新运行，这里不再调用st.rerun()
+    """
+    now = time.monotonic()
+    if now - st.session_state.get('_last_refresh', 0.0) > REFRESH_DEBOUNCE_SECONDS:
+        st.session_state['_last_refresh'] = now
+        _make_trend_df.clear()
+        _generate_orders.clear()
 
 # 侧边栏导航
 def create_sidebar():
@@ -83,17 +161,15 @@ def create_sidebar():
                 ("LLM服务", "正常", "success")
             ]
 
+            # 所有状态行放在同一个元素中渲染，不为每行创建列布局
+            rows = []
             for item, status, status_type in status_items:
-                col1, col2 = st.columns([2, 1])
-                with col1:
-                    st.write(f"**{item}**")
-                with col2:
-                    if status_type == "success":
-                        ui.element("span", children=[f"✅ {status}"], className="text-green-600")
-                    elif status_type == "warning":
-                        ui.element("span", children=[f"⚠️ {status}"], className="text-yellow-600")
-                    else:
-                        ui.element("span", children=[f"ℹ️ {status}"], className="text-blue-600")
+                cn = _ACTIVITY_CN.get(status_type, _ACTIVITY_CN["info"])
+                rows.append(ui.element("div", children=[
+                    ui.element("span", children=[item], className="font-semibold"),
+                    ui.element("span", children=[f"{cn['icon']} {status}"], className=cn['text'])
+                ], className="flex justify-between"))
+            ui.element("div", children=rows, className="space-y-1")
 
         # 快速操作
         st.divider()
@@ -111,7 +187,7 @@ def create_sidebar():
             st.info("报告生成中...")
 
         if st.button("🔄 刷新数据", use_container_width=True):
-            st.rerun()
+            _refresh_data()
 
 def create_home_page():
     """首页概览页面"""
@@ -154,17 +230,19 @@ def create_home_page():
 
     st.divider()
 
-    # 主要内容区域
-    tab1, tab2, tab3 = st.tabs(["📊 投资组合", "📈 市场概览", "🔔 最新动态"])
-
-    with tab1:
-        create_portfolio_overview()
+    # 主要内容区域：只渲染当前选中的标签页
+    selected = ui.tabs(
+        options=["📊 投资组合", "📈 市场概览", "🔔 最新动态"],
+        default_value="📊 投资组合",
+        key="home_tabs"
+    )
 
-    with tab2:
+    if selected == "📈 市场概览":
         create_market_overview()
-
-    with tab3:
+    elif selected == "🔔 最新动态":
         create_recent_activity()
+    else:
+        create_portfolio_overview()
 
 def create_portfolio_overview():
     """投资组合概览"""
@@ -175,11 +253,7 @@ def create_portfolio_overview():
         positions_df = pd.DataFrame(st.session_state.portfolio_data['positions'])
 
         # 使用streamlit-shadcn-ui的数据表格组件
-        ui.dataframe(
-            positions_df,
-            use_container_width=True,
-            key="positions_table"
-        )
+        _show_dataframe(positions_df, key="positions_table", file_name="positions.csv")
     else:
         st.info("暂无持仓数据")
 
@@ -203,50 +277,109 @@ def create_portfolio_overview():
     else:
         st.info("暂无资产分配数据")
 
+# 表格最多显示的行数，超出部分提供完整数据下载，避免单次发送到浏览器的数据过大
+MAX_DISPLAY_ROWS = 500
+
+def _truncate_for_display(df: pd.DataFrame, max_rows: int = MAX_DISPLAY_ROWS) -> Tuple[pd.DataFrame, bool]:
+    """截取前max_rows行用于显示，返回(显示数据, 是否被截断)"""
+    return df.head(max_rows), len(df) > max_rows
+
+def _show_dataframe(df: pd.DataFrame, key: str, file_name: str):
+    """显示数据表格，行数过多时只显示前面部分并提供完整CSV下载"""
+    df_show, truncated = _truncate_for_display(df)
+    ui.dataframe(df_show, use_container_width=True, key=key)
+
+    if truncated:
+        st.caption(f"显示前{len(df_show)}行，共{len(df)}行")
+        st.download_button(
+            "📥 下载完整CSV",
+            df.to_csv(index=False).encode('utf-8-sig'),
+            file_name=file_name,
+            mime="text/csv",
+            key=f"{key}_download"
+        )
+
+def _random_labels(rng: np.random.Generator, choices: list, n: int) -> pa.DictionaryArray:
+    """随机选取标签，直接生成字典编码列（int32索引 + 取值表），不逐行创建字符串对象"""
+    return pa.DictionaryArray.from_arrays(rng.integers(0, len(choices), n, dtype=np.int32), choices)
+
+# 折线图通用布局：统一悬停提示，关闭过渡动画，重绘时保留用户的缩放状态
+_LINE_CHART_LAYOUT = dict(hovermode='x unified', transition_duration=0, uirevision='keep')
+
+def _reuse_line_figure(key: str, traces: list, title: str, mode: str) -> go.Figure:
+    """
+    复用保存在session_state中的折线图，重新运行时只替换各条曲线的数据
+
+    Args:
+        key: session_state中的图表键名
+        traces: [(曲线名称, x, y), ...]
+        title: 图表标题
+        mode: 曲线绘制模式
+    """
+    fig = st.session_state.get(key)
+    names = [name for name, _, _ in traces]
+
+    if fig is None or [trace.name for trace in fig.data] != names:
+        # 首次渲染或曲线集合变化时重新创建
+        fig = go.Figure([go.Scattergl(x=x, y=y, mode=mode, name=name) for name, x, y in traces])
+        fig.update_layout(**_LINE_CHART_LAYOUT, title=title)
+        st.session_state[key] = fig
+    else:
+        with fig.batch_update():
+            for trace, (_, x, y) in zip(fig.data, traces):
+                trace.x = x
+                trace.y = y
+
+    return fig
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _make_trend_df(symbols_prices: tuple, n_hours: int, end: pd.Timestamp) -> pd.DataFrame:
+    """生成模拟价格趋势数据，symbols_prices为((股票, 基准价), ...)，end为最后一个整点"""
+    dates = pd.date_range(end=end, periods=n_hours, freq='h')
+    symbols = [symbol for symbol, _ in symbols_prices]
+    base = np.array([price for _, price in symbols_prices], dtype=float)
+
+    # 一次生成全部随机波动：行为时间，列为股票
+    noise = np.random.normal(0.0, base * 0.02, size=(len(dates), len(symbols)))
+    prices = np.maximum(0.0, base + noise)
+
+    return (
+        pd.DataFrame(prices, index=dates, columns=symbols)
+        .reset_index()
+        .melt(id_vars='index', var_name='股票', value_name='价格')
+        .rename(columns={'index': '时间'})
+    )
+
+@_fragment
 def create_market_overview():
     """市场概览"""
     st.subheader("实时市场数据")
 
     # 市场数据表格
-    market_df = pd.DataFrame([
-        {'股票': symbol, **data}
-        for symbol, data in st.session_state.market_data.items()
-    ])
-
-    ui.dataframe(
-        market_df,
-        use_container_width=True,
-        key="market_table"
-    )
+    soa = st.session_state.market_soa
+    market_df = pd.DataFrame({
+        '股票': soa['symbols'],
+        'price': soa['prices'],
+        'change': soa['changes'],
+        'volume': soa['volumes']
+    })
+
+    _show_dataframe(market_df, key="market_table", file_name="market.csv")
 
     # 价格趋势图（模拟数据）
     st.subheader("价格趋势")
 
-    # 生成模拟的价格数据
-    dates = pd.date_range(datetime.now() - timedelta(days=7), datetime.now(), freq='H')
-    trend_data = []
-
-    for symbol in st.session_state.market_data.keys():
-        base_price = st.session_state.market_data[symbol]['price']
-        for date in dates:
-            # 添加随机波动
-            price = base_price + np.random.normal(0, base_price * 0.02)
-            trend_data.append({
-                '时间': date,
-                '股票': symbol,
-                '价格': max(0, price)
-            })
-
-    trend_df = pd.DataFrame(trend_data)
-
-    # 创建价格趋势图
-    fig = px.line(
-        trend_df,
-        x='时间',
-        y='价格',
-        color='股票',
+    # 生成模拟的价格数据（按股票和基准价缓存）
+    symbols_prices = tuple(sorted(zip(soa['symbols'].tolist(), soa['prices'].tolist())))
+    # 结束时间取整到小时，同一小时内的重新运行使用相同的缓存键
+    trend_df = _make_trend_df(symbols_prices, 7 * 24, pd.Timestamp.now().floor('h'))
+
+    # 创建价格趋势图（WebGL渲染，长序列下悬停和缩放依然流畅）
+    fig = _reuse_line_figure(
+        'trend_fig',
+        [(symbol, group['时间'], group['价格']) for symbol, group in trend_df.groupby('股票', sort=False)],
         title='7天价格趋势',
-        markers=True
+        mode='lines'
     )
 
     st.plotly_chart(fig, use_container_width=True)
@@ -264,24 +397,12 @@ def create_recent_activity():
     ]
 
     for activity in activities:
-        if activity["状态"] == "success":
-            ui.element("div", children=[
-                ui.element("span", children=[f"✅ {activity['时间']}"], className="text-green-600 font-mono text-sm"),
-                ui.element("span", children=[activity["类型"]], className="mx-2 px-2 py-1 bg-green-100 text-green-800 rounded text-xs"),
-                activity["描述"]
-            ], className="mb-2 p-2 border-l-4 border-green-500 bg-gray-50")
-        elif activity["状态"] == "warning":
-            ui.element("div", children=[
-                ui.element("span", children=[f"⚠️ {activity['时间']}"], className="text-yellow-600 font-mono text-sm"),
-                ui.element("span", children=[activity["类型"]], className="mx-2 px-2 py-1 bg-yellow-100 text-yellow-800 rounded text-xs"),
-                activity["描述"]
-            ], className="mb-2 p-2 border-l-4 border-yellow-500 bg-gray-50")
-        else:
-            ui.element("div", children=[
-                ui.element("span", children=[f"ℹ️ {activity['时间']}"], className="text-blue-600 font-mono text-sm"),
-                ui.element("span", children=[activity["类型"]], className="mx-2 px-2 py-1 bg-blue-100 text-blue-800 rounded text-xs"),
-                activity["描述"]
-            ], className="mb-2 p-2 border-l-4 border-blue-500 bg-gray-50")
+        cn = _ACTIVITY_CN.get(activity["状态"], _ACTIVITY_CN["info"])
+        ui.element("div", children=[
+            ui.element("span", children=[f"{cn['icon']} {activity['时间']}"], className=cn['time']),
+            ui.element("span", children=[activity["类型"]], className=cn['badge']),
+            activity["描述"]
+        ], className=cn['box'])
 
 def create_dashboard_page():
     """交易看板页面"""
@@ -326,18 +447,21 @@ def create_dashboard_page():
 
     st.divider()
 
-    # 主要内容区
-    tab1, tab2, tab3 = st.tabs(["📊 持仓详情", "📈 图表分析", "🔔 交易记录"])
-
-    with tab1:
-        create_positions_detail()
+    # 主要内容区：只渲染当前选中的标签页
+    selected = ui.tabs(
+        options=["📊 持仓详情", "📈 图表分析", "🔔 交易记录"],
+        default_value="📊 持仓详情",
+        key="dashboard_tabs"
+    )
 
-    with tab2:
+    if selected == "📈 图表分析":
         create_charts_analysis()
-
-    with tab3:
+    elif selected == "🔔 交易记录":
         create_trades_history()
+    else:
+        create_positions_detail()
 
+@_fragment
 def create_positions_detail():
     """持仓详情"""
     st.subheader("当前持仓")
@@ -353,17 +477,13 @@ def create_positions_detail():
 
     # 使用shadcn/ui风格的数据表格
     with ui.card(key="positions_card"):
-        ui.dataframe(
-            positions_df,
-            use_container_width=True,
-            key="positions_detail_table"
-        )
+        _show_dataframe(positions_df, key="positions_detail_table", file_name="positions.csv")
 
     # 操作按钮
     col1, col2, col3 = st.columns(3)
     with col1:
         if st.button("🔄 刷新数据", use_container_width=True):
-            st.rerun()
+            _refresh_data()
     with col2:
         if st.button("📤 导出Excel", use_container_width=True):
             st.success("持仓数据已导出")
@@ -371,6 +491,7 @@ def create_positions_detail():
         if st.button("⚡ 一键调仓", use_container_width=True):
             st.info("智能调仓建议生成中...")
 
+@_fragment
 def create_charts_analysis():
     """图表分析"""
     st.subheader("投资组合分析")
@@ -380,16 +501,10 @@ def create_charts_analysis():
 
     positions = st.session_state.portfolio_data['positions']
     if positions:
-        # 准备饼图数据
-        pie_data = []
-        for pos in positions:
-            pie_data.append({
-                '股票': pos['symbol'],
-                '市值': pos['market_value'],
-                '比例': pos['market_value'] / sum(p['market_value'] for p in positions) * 100
-            })
-
-        pie_df = pd.DataFrame(pie_data)
+        # 准备饼图数据，总市值只计算一次
+        pie_df = pd.DataFrame(positions)[['symbol', 'market_value']]
+        pie_df.columns = ['股票', '市值']
+        pie_df['比例'] = pie_df['市值'] / (pie_df['市值'].sum() or 1.0) * 100
 
         fig_pie = px.pie(
             pie_df,
@@ -408,32 +523,26 @@ def create_charts_analysis():
     st.subheader("盈亏趋势分析")
 
     # 生成模拟的历史数据
-    dates = pd.date_range(datetime.now() - timedelta(days=30), datetime.now(), freq='D')
-    pnl_history = []
-
-    base_pnl = 100000
-    for i, date in enumerate(dates):
-        # 模拟每日盈亏波动
-        daily_change = np.random.normal(0, 1000)
-        base_pnl += daily_change
-        pnl_history.append({
-            '日期': date.strftime('%m-%d'),
-            '累计盈亏': base_pnl,
-            '每日盈亏': daily_change
-        })
-
-    pnl_df = pd.DataFrame(pnl_history)
-
-    fig_line = px.line(
-        pnl_df,
-        x='日期',
-        y='累计盈亏',
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=30, freq='D')
+
+    # 模拟每日盈亏波动，累计盈亏为其累加和
+    daily = np.random.default_rng().normal(0, 1000, len(dates))
+    pnl_df = pd.DataFrame({
+        '日期': dates.strftime('%m-%d'),
+        '累计盈亏': 100000 + np.cumsum(daily),
+        '每日盈亏': daily
+    })
+
+    fig_line = _reuse_line_figure(
+        'pnl_fig',
+        [('累计盈亏', pnl_df['日期'], pnl_df['累计盈亏'])],
         title='30天盈亏趋势',
-        markers=True
+        mode='lines+markers'
     )
 
     st.plotly_chart(fig_line, use_container_width=True)
 
+@_fragment
 def create_trades_history():
     """交易历史记录"""
     st.subheader("交易历史记录")
@@ -462,27 +571,24 @@ def create_trades_history():
             key="trades_status_filter"
         )
 
-    # 模拟交易数据
-    trades_data = []
-    for i in range(20):
-        trade_date = datetime.now() - timedelta(hours=i*2)
-        trades_data.append({
-            "交易时间": trade_date.strftime('%m-%d %H:%M'),
-            "股票代码": np.random.choice(['AAPL', 'GOOGL', 'MSFT']),
-            "交易方向": np.random.choice(['买入', '卖出']),
-            "数量": np.random.randint(10, 1000),
-            "价格": round(np.random.uniform(100, 300), 2),
-            "金额": 0,  # 计算得出
-            "手续费": round(np.random.uniform(5, 50), 2),
-            "盈亏": round(np.random.uniform(-500, 1000), 2),
-            "状态": np.random.choice(['已成交', '待成交', '已取消'])
-        })
-
-    # 计算金额
-    for trade in trades_data:
-        trade['金额'] = trade['数量'] * trade['价格']
-
-    trades_df = pd.DataFrame(trades_data)
+    # 模拟交易数据：每列一次生成
+    rng = np.random.default_rng()
+    n = 20
+    now = datetime.now()
+    quantities = rng.integers(10, 1000, n)
+    prices = rng.uniform(100, 300, n).round(2)
+
+    trades_df = pa.table({
+        "交易时间": pd.date_range(start=now, periods=n, freq='-2h').strftime('%m-%d %H:%M'),
+        "股票代码": _random_labels(rng, ['AAPL', 'GOOGL', 'MSFT'], n),
+        "交易方向": _random_labels(rng, ['买入', '卖出'], n),
+        "数量": quantities,
+        "价格": prices,
+        "金额": quantities * prices,
+        "手续费": rng.uniform(5, 50, n).round(2),
+        "盈亏": rng.uniform(-500, 1000, n).round(2),
+        "状态": _random_labels(rng, ['已成交', '待成交', '已取消'], n)
+    }).to_pandas(types_mapper=pd.ArrowDtype)
 
     # 应用筛选
     if symbol_filter != "全部":
@@ -493,11 +599,7 @@ def create_trades_history():
 
     # 显示交易记录
     with ui.card(key="trades_card"):
-        ui.dataframe(
-            trades_df,
-            use_container_width=True,
-            key="trades_history_table"
-        )
+        _show_dataframe(trades_df, key="trades_history_table", file_name="trades.csv")
 
     # 分页和统计
     col1, col2, col3 = st.columns(3)
@@ -506,7 +608,7 @@ def create_trades_history():
         st.metric("总交易笔数", len(trades_df))
 
     with col2:
-        profitable_trades = len(trades_df[trades_df['盈亏'] > 0])
+        profitable_trades = int(trades_df['盈亏'].gt(0).sum())
         win_rate = (profitable_trades / len(trades_df) * 100) if len(trades_df) > 0 else 0
         st.metric("胜率", f"{win_rate:.1f}%")
 
@@ -526,6 +628,7 @@ def create_trading_page():
     with tab2:
         create_order_management()
 
+@_fragment
 def create_quick_trading():
     """快速交易界面"""
     st.subheader("快速下单")
@@ -600,16 +703,38 @@ def create_quick_trading():
         with ui.card(key="market_quotes"):
             ui.element("h5", children=["市场行情"], className="mb-3")
 
-            for symbol, data in st.session_state.market_data.items():
-                pnl_class = "success" if data['change'] >= 0 else "danger"
+            soa = st.session_state.market_soa
+            for symbol, price, change, volume in zip(
+                soa['symbols'].tolist(), soa['prices'].tolist(), soa['changes'].tolist(), soa['volumes'].tolist()
+            ):
+                pnl_class = "success" if change >= 0 else "danger"
 
                 with st.container():
                     st.write(f"**{symbol}**")
-                    st.write(f"价格: ¥{data['price']}")
-                    st.write(f"涨跌: {data['change']:+.2f}")
-                    st.write(f"成交量: {data['volume']:,}", ",.0f")
+                    st.write(f"价格: ¥{price}")
+                    st.write(f"涨跌: {change:+.2f}")
+                    st.write(f"成交量: {volume:,}", ",.0f")
                     st.divider()
 
+@st.cache_data(ttl=30, show_spinner=False)
+def _generate_orders(n: int = 10, seed: Optional[int] = None) -> pd.DataFrame:
+    """生成模拟订单数据"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    date_prefix = now.strftime('%Y%m%d')
+
+    return pa.table({
+        "订单号": [f"ORD{date_prefix}{i+1:03d}" for i in range(n)],
+        "股票代码": _random_labels(rng, ['AAPL', 'GOOGL', 'MSFT'], n),
+        "交易方向": _random_labels(rng, ['买入', '卖出'], n),
+        "订单类型": _random_labels(rng, ['市价单', '限价单'], n),
+        "数量": rng.integers(10, 1000, n),
+        "价格": rng.uniform(100, 300, n).round(2),
+        "状态": _random_labels(rng, ['待成交', '已成交', '已取消'], n),
+        "下单时间": pd.date_range(start=now, periods=n, freq='-5min').strftime('%H:%M:%S')
+    }).to_pandas(types_mapper=pd.ArrowDtype)
+
+@_fragment
 def create_order_management():
     """订单管理"""
     st.subheader("订单管理")
@@ -617,34 +742,19 @@ def create_order_management():
     # 订单状态标签页
     tab1, tab2, tab3 = st.tabs(["📋 全部订单", "⏳ 待成交", "✅ 已成交"])
 
+    # 模拟订单数据只生成一次，各标签页分别筛选
+    all_orders_df = _generate_orders()
+
     for tab, status_filter in [(tab1, "全部"), (tab2, "待成交"), (tab3, "已成交")]:
         with tab:
-            # 模拟订单数据
-            orders_data = []
-            for i in range(10):
-                orders_data.append({
-                    "订单号": f"ORD{datetime.now().strftime('%Y%m%d')}{i+1:03d}",
-                    "股票代码": np.random.choice(['AAPL', 'GOOGL', 'MSFT']),
-                    "交易方向": np.random.choice(['买入', '卖出']),
-                    "订单类型": np.random.choice(['市价单', '限价单']),
-                    "数量": np.random.randint(10, 1000),
-                    "价格": round(np.random.uniform(100, 300), 2),
-                    "状态": np.random.choice(['待成交', '已成交', '已取消']),
-                    "下单时间": (datetime.now() - timedelta(minutes=i*5)).strftime('%H:%M:%S')
-                })
-
-            orders_df = pd.DataFrame(orders_data)
+            orders_df = all_orders_df
 
             if status_filter != "全部":
                 status_map = {"待成交": "待成交", "已成交": "已成交"}
                 orders_df = orders_df[orders_df['状态'] == status_map.get(status_filter, status_filter)]
 
             if not orders_df.empty:
-                ui.dataframe(
-                    orders_df,
-                    use_container_width=True,
-                    key=f"orders_table_{status_filter}"
-                )
+                _show_dataframe(orders_df, key=f"orders_table_{status_filter}", file_name="orders.csv")
 
                 # 批量操作
                 if status_filter == "待成交":
@@ -658,6 +768,7 @@ def create_order_management():
             else:
                 st.info(f"暂无{status_filter}订单")
 
+@_fragment
 def create_risk_page():
     """风险控制页面"""
     st.title("🛡️ 风险控制中心")
@@ -883,6 +994,7 @@ def create_risk_alerts():
                 st.info(f"💡 建议：{alert['建议']}")
             st.divider()
 
+@_fragment
 def create_analysis_page():
     """技术分析页面"""
     st.title("📈 技术分析中心")
@@ -981,6 +1093,7 @@ def show_technical_analysis(symbol, tools):
                 for key, value in result.items():
                     st.write(f"**{key}:** {value}")
 
+@_fragment
 def create_settings_page():
     """系统设置页面"""
     st.title("⚙️ 系统设置")
@@ -1082,14 +1195,7 @@ def create_data_source_settings():
 
     with ui.card(key="data_sources"):
         # 数据供应商配置
-        data_providers = {
-            "股票数据": ["yfinance", "alpha_vantage", "本地数据"],
-            "技术指标": ["yfinance", "alpha_vantage", "本地计算"],
-            "基本面数据": ["alpha_vantage", "本地数据"],
-            "新闻数据": ["alpha_vantage", "google_news", "本地数据"]
-        }
-
-        for data_type, providers in data_providers.items():
+        for data_type, providers in _DATA_PROVIDERS.items():
             st.selectbox(
                 data_type,
                 providers,
@@ -1129,14 +1235,7 @@ def create_security_settings():
         # API密钥管理
         st.subheader("API密钥管理")
 
-        api_keys = {
-            "华泰证券": "ht_app_key",
-            "广发证券": "gf_app_key",
-            "OpenAI": "openai_key",
-            "邮件服务": "email_key"
-        }
-
-        for name, key_id in api_keys.items():
+        for name, key_id in _API_KEYS:
             with st.expander(f"{name} API配置"):
                 api_key = st.text_input(
                     f"{name} API密钥",
@@ -1171,6 +1270,9 @@ def create_security_settings():
 # 主应用路由
 def main():
     """主应用"""
+    # 页面配置和会话状态必须在其他Streamlit调用之前设置
+    setup_page()
+
     # 创建侧边栏
     create_sidebar()
 
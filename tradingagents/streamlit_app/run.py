@@ -7,6 +7,8 @@ TradingAgents Streamlit前端启动脚本
 import os
 import sys
 import logging
+import functools
+import importlib.util
 import subprocess
 from pathlib import Path
 
@@ -21,6 +23,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 前端运行所需的依赖包
+REQUIRED_PACKAGES = (
+    'streamlit',
+    'streamlit-shadcn-ui',
+    'plotly',
+    'pandas',
+    'numpy'
+)
+
 
 def run_streamlit_app():
     """启动Streamlit应用"""
@@ -49,23 +60,15 @@ def run_streamlit_app():
         sys.exit(1)
 
 
+@functools.lru_cache(maxsize=None)
+def _is_installed(package: str) -> bool:
+    """只查找模块位置而不执行导入，避免加载streamlit、plotly等大型包"""
+    return importlib.util.find_spec(package.replace('-', '_')) is not None
+
+
 def check_dependencies():
     """检查依赖是否安装"""
-    required_packages = [
-        'streamlit',
-        'streamlit-shadcn-ui',
-        'plotly',
-        'pandas',
-        'numpy'
-    ]
-
-    missing_packages = []
-
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing_packages.append(package)
+    missing_packages = [package for package in REQUIRED_PACKAGES if not _is_installed(package)]
 
     if missing_packages:
         logger.error(f"缺少必要依赖包: {', '.join(missing_packages)}")
@@ -81,8 +84,8 @@ def main():
     print("🚀 TradingAgents Streamlit前端启动器")
     print("=" * 50)
 
-    # 检查依赖
-    if not check_dependencies():
+    # 检查依赖（设置 TRADINGAGENTS_SKIP_DEPCHECK=1 可跳过）
+    if os.environ.get("TRADINGAGENTS_SKIP_DEPCHECK") != "1" and not check_dependencies():
         sys.exit(1)
 
     # 检查配置文件
@@ -4,14 +4,14 @@ TradingAgents Streamlit前端使用示例
 展示现代化Web界面的各项功能
 """
 
+import functools
+import html
 import streamlit as st
-import streamlit_shadcn_ui as ui
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date
 import time
+import types
 
 # 设置页面配置
 st.set_page_config(
@@ -21,6 +21,42 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# plotly和streamlit_shadcn_ui导入较慢，只在用到的页面中导入
+@functools.cache
+def _ui():
+    """延迟导入streamlit_shadcn_ui"""
+    import streamlit_shadcn_ui as ui
+    return ui
+
+# 演示持仓股票
+TICKERS = np.array(["AAPL", "GOOGL", "MSFT", "000858.SZ", "600519.SS", "TSLA", "AMZN", "NVDA"])
+
+# 演示页面的固定选项，跨会话共享且不可修改
+_AGENTS = ("研究员", "分析师", "交易员", "风险管理")
+
+# (指标名称, 数值, 说明, 状态)
+_RISK_INDICATORS = (
+    ("持仓风险", "15.2%", "低于警戒线", "success"),
+    ("资金利用率", "68.5%", "合理水平", "info"),
+    ("最大回撤", "-3.2%", "控制良好", "success"),
+    ("风险评级", "A级", "低风险", "success")
+)
+
+_DATA_PROVIDERS = types.MappingProxyType({
+    "股票数据": ("yfinance", "alpha_vantage", "本地数据"),
+    "技术指标": ("yfinance", "alpha_vantage", "本地计算"),
+    "新闻数据": ("alpha_vantage", "google_news", "本地数据")
+})
+
+# 局部重新运行：页面内的交互只重新执行该页面，旧版Streamlit没有此功能时按普通函数执行
+_st_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+def _fragment(run_every=None):
+    """页面级fragment装饰器，run_every为定时自动刷新的间隔（秒）"""
+    if _st_fragment is None:
+        return lambda func: func
+    return _st_fragment(run_every=run_every)
+
 def main():
     """主函数"""
     st.title("🚀 TradingAgents Streamlit前端演示")
@@ -70,8 +106,21 @@ def main():
     elif page == "系统设置":
         show_settings_demo()
 
+@st.cache_data(show_spinner=False)
+def _build_assets_df() -> pd.DataFrame:
+    """生成模拟资产分配数据"""
+    return pd.DataFrame({
+        '资产类型': ['股票', '现金', '债券', '基金'],
+        '市值': [600000, 300000, 100000, 25000],
+        '占比': [60, 30, 10, 2.5]
+    })
+
+@_fragment()
 def show_home_demo():
     """首页概览演示"""
+    import plotly.express as px
+    ui = _ui()
+
     st.header("🏠 首页概览")
 
     # 使用shadcn/ui组件展示指标
@@ -115,11 +164,7 @@ def show_home_demo():
     st.subheader("资产分配可视化")
 
     # 创建模拟数据
-    assets_data = pd.DataFrame({
-        '资产类型': ['股票', '现金', '债券', '基金'],
-        '市值': [600000, 300000, 100000, 25000],
-        '占比': [60, 30, 10, 2.5]
-    })
+    assets_data = _build_assets_df()
 
     fig = px.pie(
         assets_data,
@@ -157,8 +202,47 @@ def show_home_demo():
 
             st.divider()
 
+@st.cache_data(ttl=5, show_spinner=False)
+def _build_positions_df(seed: int) -> pd.DataFrame:
+    """生成模拟持仓数据"""
+    rng = np.random.default_rng(seed)
+    n = len(TICKERS)
+    pnl = rng.uniform(-5000, 15000, n)
+    ratio = pnl / rng.integers(50000, 200000, n) * 100
+
+    return pd.DataFrame({
+        "股票代码": TICKERS,
+        "持仓数量": rng.integers(10, 1000, n),
+        "平均成本": rng.uniform(50, 300, n).round(2),
+        "当前价格": rng.uniform(50, 300, n).round(2),
+        "市值": rng.integers(10000, 100000, n),
+        "浮动盈亏": pnl,
+        "盈亏比例": pd.Series(ratio).map("{:.2f}%".format)
+    })
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _pnl_trend(day: date) -> pd.DataFrame:
+    """生成截至day的30天模拟盈亏趋势，同一天内结果固定"""
+    dates = pd.date_range(end=pd.Timestamp(day), periods=31, freq='D')
+    pnl_values = np.cumsum(np.random.default_rng(day.toordinal()).normal(1000, 5000, len(dates)))
+
+    return pd.DataFrame({
+        '日期': dates.strftime('%m-%d'),
+        '累计盈亏': pnl_values
+    })
+
 def show_dashboard_demo():
-    """交易看板演示"""
+    """交易看板演示，侧边栏启用实时更新时每5秒只刷新本页面"""
+    if st.session_state.get('realtime_switch', True):
+        _dashboard_demo_live()
+    else:
+        _dashboard_demo_static()
+
+def _dashboard_demo():
+    """交易看板演示内容"""
+    import plotly.express as px
+    ui = _ui()
+
     st.header("📊 交易看板演示")
 
     # 实时指标
@@ -204,21 +288,8 @@ def show_dashboard_demo():
     # 持仓表格演示
     st.subheader("持仓详情")
 
-    # 创建模拟持仓数据
-    positions_data = []
-    for i in range(8):
-        pnl = np.random.uniform(-5000, 15000)
-        positions_data.append({
-            "股票代码": ["AAPL", "GOOGL", "MSFT", "000858.SZ", "600519.SS", "TSLA", "AMZN", "NVDA"][i],
-            "持仓数量": np.random.randint(10, 1000),
-            "平均成本": round(np.random.uniform(50, 300), 2),
-            "当前价格": round(np.random.uniform(50, 300), 2),
-            "市值": np.random.randint(10000, 100000),
-            "浮动盈亏": pnl,
-            "盈亏比例": f"{pnl/np.random.randint(50000, 200000)*100:.2f}%"
-        })
-
-    positions_df = pd.DataFrame(positions_data)
+    # 创建模拟持仓数据（每5秒更新一次，期间的重新运行直接使用缓存）
+    positions_df = _build_positions_df(int(time.time() // 5))
 
     # 使用shadcn/ui数据表格
     with ui.card(key="positions_demo"):
@@ -234,14 +305,8 @@ def show_dashboard_demo():
     tab1, tab2 = st.tabs(["📈 盈亏趋势", "🥧 持仓分布"])
 
     with tab1:
-        # 盈亏趋势图
-        dates = pd.date_range(datetime.now() - timedelta(days=30), datetime.now(), freq='D')
-        pnl_values = np.cumsum(np.random.normal(1000, 5000, len(dates)))
-
-        pnl_df = pd.DataFrame({
-            '日期': dates.strftime('%m-%d'),
-            '累计盈亏': pnl_values
-        })
+        # 盈亏趋势图（同一天内数据不变）
+        pnl_df = _pnl_trend(date.today())
 
         fig_line = px.line(
             pnl_df,
@@ -264,6 +329,45 @@ def show_dashboard_demo():
 
         st.plotly_chart(pie_fig, use_container_width=True)
 
+# 启用实时更新时每5秒自动刷新，关闭后只在页面内交互时重新运行
+_dashboard_demo_live = _fragment(run_every=5)(_dashboard_demo)
+_dashboard_demo_static = _fragment()(_dashboard_demo)
+
+# 技术指标演示数据: 指标 -> (数值行, 结论, 徽章类型)
+_INDICATOR_DEMO = {
+    "移动平均线": (("MA5: 150.25", "MA10: 149.80", "MA20: 148.50"), "趋势: 上升", "success"),
+    "MACD": (("MACD: 1.25", "信号线: 1.10", "柱状图: 0.15"), "信号: 买入", "success"),
+    "RSI": (("RSI: 65.5", "状态: 适中"), "建议: 持有", "info")
+}
+_INDICATOR_PENDING = (("计算中...",), "待实现", "secondary")
+
+_CARD_STYLE = "border:1px solid #e5e7eb;border-radius:0.5rem;padding:1rem"
+
+def _indicator_html(indicator: str) -> str:
+    """生成单个技术指标卡片的HTML"""
+    lines, badge, badge_type = _INDICATOR_DEMO.get(indicator, _INDICATOR_PENDING)
+    rows = ''.join(f"<p style='margin-bottom:0.5rem'>{line}</p>" for line in lines)
+    return (
+        f"<div style='{_CARD_STYLE}'><h6>{html.escape(indicator)}</h6>{rows}"
+        f"<span class='badge badge-{badge_type}'>{badge}</span></div>"
+    )
+
+# 预警颜色 -> (图标, 文字颜色, 边框颜色, 背景颜色)
+_ALERT_STYLE = {
+    "info": ("🔵", "#2563eb", "#3b82f6", "#eff6ff"),
+    "warning": ("🟡", "#ca8a04", "#eab308", "#fefce8")
+}
+
+def _alert_html(alert: dict, icon: str, text_color: str, border_color: str, bg_color: str) -> str:
+    """生成单条风险预警的HTML"""
+    return (
+        f"<div style='margin-bottom:0.75rem;padding:0.75rem;border-left:4px solid {border_color};background:{bg_color}'>"
+        f"<span style='color:{text_color};font-weight:600'>{icon} {html.escape(alert['等级'])}级预警</span>"
+        f"<p style='margin-bottom:0.5rem'><b>{html.escape(alert['类型'])}</b>: {html.escape(alert['描述'])}</p>"
+        f"<p style='font-size:0.875rem;color:#4b5563'>💡 建议：{html.escape(alert['建议'])}</p></div>"
+    )
+
+@_fragment()
 def show_analysis_demo():
     """技术分析演示"""
     st.header("📈 技术分析演示")
@@ -297,16 +401,11 @@ def show_analysis_demo():
 
     # 生成技术分析报告
     if st.button("🔍 生成分析报告", type="primary", use_container_width=True):
+        # 各阶段即时完成，不再人为等待，避免阻塞该会话的其他交互
         with st.status("正在生成技术分析报告...", expanded=True) as status:
             st.write("📊 收集市场数据...")
-            time.sleep(1)
-
             st.write("📈 计算技术指标...")
-            time.sleep(1)
-
             st.write("🔍 识别交易信号...")
-            time.sleep(1)
-
             status.update(label="✅ 分析完成！", state="complete")
 
         # 显示分析结果
@@ -314,41 +413,17 @@ def show_analysis_demo():
 
 def show_analysis_results(stock, indicators):
     """显示技术分析结果"""
+    ui = _ui()
+
     st.subheader(f"{stock} 技术分析报告")
 
     # 创建多列布局显示不同指标
     cols = st.columns(len(indicators))
 
+    # 每个指标只发送一段HTML，不逐个创建组件
     for i, indicator in enumerate(indicators):
         with cols[i]:
-            with ui.card(key=f"indicator_{indicator}_{i}"):
-                ui.element("h6", children=[indicator], className="mb-3")
-
-                if indicator == "移动平均线":
-                    ui.element("div", children=[
-                        ui.element("p", children=["MA5: 150.25"], className="mb-2"),
-                        ui.element("p", children=["MA10: 149.80"], className="mb-2"),
-                        ui.element("p", children=["MA20: 148.50"], className="mb-2"),
-                        ui.element("span", children=["趋势: 上升"], className="badge badge-success")
-                    ])
-                elif indicator == "MACD":
-                    ui.element("div", children=[
-                        ui.element("p", children=["MACD: 1.25"], className="mb-2"),
-                        ui.element("p", children=["信号线: 1.10"], className="mb-2"),
-                        ui.element("p", children=["柱状图: 0.15"], className="mb-2"),
-                        ui.element("span", children=["信号: 买入"], className="badge badge-success")
-                    ])
-                elif indicator == "RSI":
-                    ui.element("div", children=[
-                        ui.element("p", children=["RSI: 65.5"], className="mb-2"),
-                        ui.element("p", children=["状态: 适中"], className="mb-2"),
-                        ui.element("span", children=["建议: 持有"], className="badge badge-info")
-                    ])
-                else:
-                    ui.element("div", children=[
-                        ui.element("p", children=["计算中..."], className="mb-2"),
-                        ui.element("span", children=["待实现"], className="badge badge-secondary")
-                    ])
+            st.markdown(_indicator_html(indicator), unsafe_allow_html=True)
 
     # 综合评分
     st.subheader("综合评分")
@@ -379,8 +454,12 @@ def show_analysis_results(stock, indicators):
             key="investment_advice"
         )
 
+@_fragment()
 def show_risk_demo():
     """风险控制演示"""
+    import plotly.express as px
+    ui = _ui()
+
     st.header("🛡️ 风险控制演示")
 
     # 风险指标概览
@@ -388,14 +467,7 @@ def show_risk_demo():
 
     risk_cols = st.columns(4)
 
-    risk_indicators = [
-        ("持仓风险", "15.2%", "低于警戒线", "success"),
-        ("资金利用率", "68.5%", "合理水平", "info"),
-        ("最大回撤", "-3.2%", "控制良好", "success"),
-        ("风险评级", "A级", "低风险", "success")
-    ]
-
-    for i, (title, value, desc, status) in enumerate(risk_indicators):
+    for i, (title, value, desc, status) in enumerate(_RISK_INDICATORS):
         with risk_cols[i]:
             ui.metric_card(
                 title=title,
@@ -444,22 +516,18 @@ def show_risk_demo():
         }
     ]
 
-    for alert in alerts:
-        if alert["颜色"] == "info":
-            ui.element("div", children=[
-                ui.element("span", children=[f"🔵 {alert['等级']}级预警"], className="text-blue-600 font-semibold"),
-                ui.element("p", children=[f"**{alert['类型']}**: {alert['描述']}"], className="mb-2"),
-                ui.element("p", children=[f"💡 建议：{alert['建议']}"], className="text-sm text-gray-600")
-            ], className="mb-3 p-3 border-l-4 border-blue-500 bg-blue-50")
-        elif alert["颜色"] == "warning":
-            ui.element("div", children=[
-                ui.element("span", children=[f"🟡 {alert['等级']}级预警"], className="text-yellow-600 font-semibold"),
-                ui.element("p", children=[f"**{alert['类型']}**: {alert['描述']}"], className="mb-2"),
-                ui.element("p", children=[f"💡 建议：{alert['建议']}"], className="text-sm text-gray-600")
-            ], className="mb-3 p-3 border-l-4 border-yellow-500 bg-yellow-50")
+    # 所有预警合并为一段HTML输出
+    alerts_html = ''.join(
+        _alert_html(alert, *_ALERT_STYLE[alert["颜色"]])
+        for alert in alerts if alert["颜色"] in _ALERT_STYLE
+    )
+    st.markdown(alerts_html, unsafe_allow_html=True)
 
+@_fragment()
 def show_settings_demo():
     """系统设置演示"""
+    ui = _ui()
+
     st.header("⚙️ 系统设置演示")
 
     tab1, tab2, tab3 = st.tabs(["🔧 基础设置", "🤖 LLM配置", "📊 数据源"])
@@ -501,9 +569,7 @@ def show_settings_demo():
         st.subheader("LLM配置演示")
 
         # 演示不同智能体的LLM配置
-        agents = ["研究员", "分析师", "交易员", "风险管理"]
-
-        for agent in agents:
+        for agent in _AGENTS:
             with st.expander(f"{agent} LLM配置"):
                 col1, col2 = st.columns(2)
 
@@ -546,13 +612,7 @@ def show_settings_demo():
 
         with ui.card(key="data_sources_demo"):
             # 数据供应商选择
-            data_providers = {
-                "股票数据": ["yfinance", "alpha_vantage", "本地数据"],
-                "技术指标": ["yfinance", "alpha_vantage", "本地计算"],
-                "新闻数据": ["alpha_vantage", "google_news", "本地数据"]
-            }
-
-            for data_type, providers in data_providers.items():
+            for data_type, providers in _DATA_PROVIDERS.items():
                 st.selectbox(
                     data_type,
                     providers,
@@ -586,6 +646,9 @@ def show_settings_demo():
 
 def show_component_demo():
     """shadcn/ui组件演示"""
+    import plotly.express as px
+    ui = _ui()
+
     st.header("🎨 shadcn/ui组件演示")
 
     st.info("以下展示streamlit-shadcn-ui的主要组件效果")